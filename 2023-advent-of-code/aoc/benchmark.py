@@ -0,0 +1,286 @@
+"""
+Statistical benchmarks of the days. Every phase (parsing the input and solving each part) is
+warmed up, timed `repeat` times and summarised with its min/median/p95, so the results can be
+written as JSON and compared against a stored baseline to catch regressions.
+
+`scaling` runs the same phases with synthetic inputs of increasing sizes, to see how their time
+and memory grow.
+"""
+
+import dataclasses
+import json
+import math
+import os
+import platform
+import statistics
+import timeit
+
+from collections.abc import Callable
+
+from aoc import inputs, trace
+from aoc.runner import Solution
+
+
+DEFAULT_REPEAT = 10
+DEFAULT_WARMUP = 2
+MIN_SAMPLE_TIME = 0.01 # Fast phases are called several times per sample to reach it (timer resolution)
+DEFAULT_THRESHOLD = 0.10 # Slowdown of the median over the baseline reported as a regression
+COLD_REPEAT = 2 # New interpreters started to time the first call of every phase (the fastest one is kept)
+COLD_MIN_SLOWDOWN = 0.05 # First calls are noisy, so smaller slowdowns of them are not regressions
+
+Phase = tuple[str, Callable[[], object]]
+
+
+@dataclasses.dataclass
+class Stats:
+    "Timings of a phase, in seconds per call"
+    min: float
+    median: float
+    p95: float
+    mean: float
+    stdev: float
+    repeat: int
+    number: int # Calls timed together in every sample (for the phases that take microseconds)
+    counters: dict[str, int] = dataclasses.field(default_factory=dict) # Of a single call (see `aoc.trace`)
+    cold: float = 0.0 # The first call in a new interpreter, with the lazy imports and caches (0 if unknown)
+
+
+def measure(fn: Callable[[], object], repeat: int = DEFAULT_REPEAT, warmup: int = DEFAULT_WARMUP) -> Stats:
+    timer = timeit.Timer(fn)
+
+    # The first call fills the caches (and imports), so it's only used to pick the number of calls
+    # (see `cold_time`)
+    first = timer.timeit(number=1)
+    number = max(1, math.ceil(MIN_SAMPLE_TIME / first)) if first > 0 else 1000
+
+    timer.repeat(repeat=warmup, number=number)
+    samples = [total / number for total in timer.repeat(repeat=repeat, number=number)]
+
+    return Stats(
+        min=min(samples),
+        median=statistics.median(samples),
+        p95=statistics.quantiles(samples, n=20, method='inclusive')[18] if repeat > 1 else samples[0],
+        mean=statistics.fmean(samples),
+        stdev=statistics.stdev(samples) if repeat > 1 else 0.0,
+        repeat=repeat,
+        number=number,
+    )
+
+
+def phase_names(solution: Solution) -> list[str]:
+    """
+    The phases of a day: parsing and solving each part from the parsed input (when the day
+    supports it), each part from scratch and both parts parsing the input once (`all`)
+    """
+    names = ['parse'] if solution.parse is not None else []
+
+    if solution.parses_once:
+        names += ['solve1', 'solve2']
+
+    return names + ['part1', 'part2', 'all']
+
+
+def phase(solution: Solution, problem_input: list[str], name: str) -> Callable[[], object]:
+    "The function timed in a phase (what it needs, like the parsed input of `solve1`, is prepared here)"
+    problem_input = inputs.from_lines(problem_input, solution.reads)
+
+    match name:
+        case 'parse':
+            return lambda: solution.parse(problem_input)
+        case 'solve1' | 'solve2':
+            parsed = solution.parse(problem_input)
+            solve = solution.solve_parsed_part1 if name == 'solve1' else solution.solve_parsed_part2
+            return lambda: solve(parsed)
+        case 'part1':
+            return lambda: solution.solve_part1(problem_input)
+        case 'part2':
+            return lambda: solution.solve_part2(problem_input)
+        case 'all':
+            return lambda: solution.solve_both(problem_input)
+        case _:
+            raise ValueError(f'Unknown phase: {name}')
+
+
+def phases(solution: Solution, problem_input: list[str]) -> list[Phase]:
+    return [(name, phase(solution, problem_input, name)) for name in phase_names(solution)]
+
+
+# Times the first call of a phase: python -c COLD_SCRIPT <package directory> <day directory> <phase> < input
+COLD_SCRIPT = '''
+import sys, time
+sys.path.insert(0, sys.argv[1])
+from aoc import benchmark, runner
+fn = benchmark.phase(runner.load(sys.argv[2]), sys.stdin.readlines(), sys.argv[3])
+start = time.perf_counter()
+fn()
+print(time.perf_counter() - start)
+'''
+
+
+def cold_time(solution: Solution, problem_input: list[str], name: str) -> float:
+    """
+    Time of the first call of a phase in a new interpreter, so it pays for everything that the
+    warm samples don't see: the lazy imports (like numpy) and building the caches (like the
+    tables of day 7). In this interpreter they were already paid by the checks.
+    """
+    import subprocess
+    import sys
+
+    package_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    times = []
+
+    for _ in range(COLD_REPEAT):
+        process = subprocess.run(
+            [sys.executable, '-c', COLD_SCRIPT, package_directory, solution.directory, name],
+            input=''.join(problem_input), capture_output=True, text=True, check=True,
+        )
+        times.append(float(process.stdout))
+
+    return min(times)
+
+
+def trace_counters(fn: Callable[[], object]) -> dict[str, int]:
+    "Counters of the hot paths of a single call (tracing is off while timing, so it costs nothing)"
+    with trace.collect() as counters:
+        fn()
+
+    return dict(counters)
+
+
+def benchmark_solution(solution: Solution, problem_input: list[str], repeat: int = DEFAULT_REPEAT) -> dict[str, Stats]:
+    results = {}
+
+    for name, fn in phases(solution, problem_input):
+        results[name] = measure(fn, repeat)
+        results[name].counters = trace_counters(fn)
+        results[name].cold = cold_time(solution, problem_input, name)
+
+    return results
+
+
+def print_results(results: dict[str, Stats]):
+    print(f'{"phase":<8} {"cold":>10} {"min":>10} {"median":>10} {"p95":>10} {"stdev":>10}')
+
+    for name, stats in results.items():
+        counters = ', '.join(f'{counter}={value}' for counter, value in sorted(stats.counters.items()))
+        print(f'{name:<8} {stats.cold * 1e3:>8.3f}ms {stats.min * 1e3:>8.3f}ms {stats.median * 1e3:>8.3f}ms '
+              f'{stats.p95 * 1e3:>8.3f}ms {stats.stdev * 1e3:>8.3f}ms  {counters}'.rstrip())
+
+
+def to_json(results: dict[str, dict[str, Stats]]) -> dict[str, object]:
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'days': {
+            day: {name: dataclasses.asdict(stats) for name, stats in day_results.items()}
+            for day, day_results in results.items()
+        },
+    }
+
+
+def write_json(path: str, results: dict[str, dict[str, Stats]]):
+    with open(path, 'w') as f:
+        json.dump(to_json(results), f, indent=2)
+        f.write('\n')
+
+
+def read_baseline(path: str) -> dict[str, dict[str, Stats]]:
+    with open(path) as f:
+        days = json.load(f)['days']
+
+    return {
+        day: {name: Stats(**stats) for name, stats in day_results.items()}
+        for day, day_results in days.items()
+    }
+
+
+def compare(
+    results: dict[str, dict[str, Stats]],
+    baseline: dict[str, dict[str, Stats]],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> list[str]:
+    """
+    Returns a line for every phase whose median (or cold first call, so slower imports and caches
+    are caught too) is slower than the baseline by more than `threshold`. The cold call must also
+    be slower by at least COLD_MIN_SLOWDOWN.
+    """
+    regressions = []
+
+    for day, day_results in results.items():
+        for name, stats in day_results.items():
+            before: Stats | None = baseline.get(day, {}).get(name)
+
+            if before is None:
+                continue
+
+            for measure_name, old, new in (('median', before.median, stats.median), ('cold', before.cold, stats.cold)):
+                if old <= 0:
+                    continue
+
+                change = new / old - 1
+
+                if change > threshold and (measure_name == 'median' or new - old > COLD_MIN_SLOWDOWN):
+                    regressions.append(
+                        f'{day} {name} ({measure_name}): {old * 1e3:.3f}ms -> {new * 1e3:.3f}ms (+{change:.0%})'
+                    )
+
+    return regressions
+
+
+@dataclasses.dataclass
+class Scaling:
+    "Timings and peak memory (in bytes, traced with tracemalloc) of a phase with an input of `size`"
+    phase: str
+    size: int
+    stats: Stats
+    peak_memory: int
+
+
+def peak_memory(fn: Callable[[], object]) -> int:
+    import tracemalloc
+
+    tracemalloc.start()
+
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def scaling(solution: Solution, sizes: list[int], seed: int, repeat: int = 3) -> list[Scaling]:
+    "Runs every phase of the day with synthetic inputs of increasing sizes (see `aoc.generators`)"
+    from aoc import generators
+
+    results = []
+
+    for size in sizes:
+        problem_input = generators.generate(solution.name, size, seed)
+
+        for name, fn in phases(solution, problem_input):
+            results.append(Scaling(name, size, measure(fn, repeat, warmup=0), peak_memory(fn)))
+
+    return results
+
+
+def print_scaling(results: list[Scaling], size_name: str):
+    """
+    Prints the results of `scaling` with the growth of the time between consecutive sizes as an
+    exponent (time ~ size^k): ~1 is linear, ~2 quadratic, etc. The size of the grids is their
+    side, so a solution linear in the number of tiles grows with k ~2.
+    """
+    print(f'{"phase":<8} {size_name:>12} {"median":>12} {"k":>6} {"peak memory":>14}')
+    previous: dict[str, Scaling] = {}
+
+    for result in sorted(results, key=lambda result: result.phase):
+        before = previous.get(result.phase)
+        growth = ''
+
+        if before is not None and before.stats.median > 0 and result.size != before.size:
+            growth = '%.2f' % (
+                math.log(result.stats.median / before.stats.median) / math.log(result.size / before.size)
+            )
+
+        print(f'{result.phase:<8} {result.size:>12} {result.stats.median * 1e3:>10.3f}ms {growth:>6} '
+              f'{result.peak_memory / 1024:>12.1f}KB')
+        previous[result.phase] = result
@@ -0,0 +1,312 @@
+"""
+Generators of synthetic inputs for every day, to see how the solutions scale with inputs much
+bigger than the real ones. Every generator takes a size (whose meaning depends on the day: the
+side of the grid, the number of lines...) and a seeded `random.Random`, so the same size and seed
+always produce the same input, and returns the lines of a valid input (with an answer).
+"""
+
+import dataclasses
+import random
+
+from collections.abc import Callable
+
+
+@dataclasses.dataclass
+class Generator:
+    generate: Callable[[int, random.Random], list[str]]
+    size: str # What the size means, for the tables
+    sizes: list[int] # Default sizes of the scaling benchmark
+
+
+def trebuchet(size: int, rng: random.Random) -> list[str]:
+    "`size` lines of letters, digits and spelled digits (at least one digit in each)"
+    words = ['one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine']
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    lines = []
+
+    for _ in range(size):
+        tokens = [str(rng.randint(1, 9))]
+
+        for _ in range(rng.randint(2, 12)):
+            kind = rng.random()
+
+            if kind < 0.2:
+                tokens.append(str(rng.randint(0, 9)))
+            elif kind < 0.4:
+                tokens.append(rng.choice(words))
+            else:
+                tokens.append(''.join(rng.choices(letters, k=rng.randint(1, 4))))
+
+        rng.shuffle(tokens)
+        lines.append(''.join(tokens) + '\n')
+
+    return lines
+
+
+def cube_conundrum(size: int, rng: random.Random) -> list[str]:
+    "`size` games of 1 to 6 sets with up to 20 cubes of each colour"
+    lines = []
+
+    for game in range(1, size + 1):
+        sets = []
+
+        for _ in range(rng.randint(1, 6)):
+            colors = rng.sample(['red', 'green', 'blue'], k=rng.randint(1, 3))
+            sets.append(', '.join(f'{rng.randint(1, 20)} {color}' for color in colors))
+
+        lines.append(f'Game {game}: {"; ".join(sets)}\n')
+
+    return lines
+
+
+def gear_ratios(size: int, rng: random.Random) -> list[str]:
+    "A `size` x `size` schematic with numbers of 1 to 3 digits, symbols and gears"
+    lines = []
+
+    for _ in range(size):
+        row: list[str] = []
+
+        while len(row) < size:
+            kind = rng.random()
+
+            if kind < 0.12 and size - len(row) >= 4:
+                # A number is always followed by something that isn't a digit
+                row.extend(str(rng.randint(1, 999)))
+                row.append(rng.choice('.....*#+$'))
+            elif kind < 0.17:
+                row.append(rng.choice('*#+$/@=%&-'))
+            else:
+                row.append('.')
+
+        lines.append(''.join(row[:size]) + '\n')
+
+    return lines
+
+
+def scratchcards(size: int, rng: random.Random) -> list[str]:
+    """
+    `size` cards with 10 winning numbers and 25 numbers. Most cards win nothing (less than one
+    match on average), so the number of copies doesn't grow exponentially, and the last cards
+    never win copies of cards past the end of the table.
+    """
+    lines = []
+
+    for card in range(1, size + 1):
+        matches = min(rng.choice([0, 0, 0, 0, 0, 0, 0, 0, 1, 2, 4, 10]), size - card)
+        numbers = rng.sample(range(1, 100), k=10 + 25 - matches)
+        winning, others = numbers[:10], numbers[10:]
+        have = winning[:matches] + others
+        rng.shuffle(have)
+
+        lines.append(
+            f'Card {card:>3}: {" ".join(f"{n:>2}" for n in winning)} | {" ".join(f"{n:>2}" for n in have)}\n'
+        )
+
+    return lines
+
+
+def give_seed_fertilizer(size: int, rng: random.Random) -> list[str]:
+    "10 seed ranges of `size` seeds each and 7 maps of 40 disjoint transformers"
+    categories = ['seed', 'soil', 'fertilizer', 'water', 'light', 'temperature', 'humidity', 'location']
+    limit = 2 ** 32
+
+    seeds = []
+
+    for _ in range(10):
+        seeds.extend([rng.randrange(limit - size), size])
+
+    lines = [f'seeds: {" ".join(map(str, seeds))}\n']
+
+    for source, destination in zip(categories, categories[1:]):
+        lines.extend(['\n', f'{source}-to-{destination} map:\n'])
+        bounds = sorted(rng.sample(range(limit), k=80))
+
+        for start, end in zip(bounds[::2], bounds[1::2]):
+            lines.append(f'{rng.randrange(limit - (end - start))} {start} {end - start}\n')
+
+    return lines
+
+
+def wait_for_it(size: int, rng: random.Random) -> list[str]:
+    "`size` races of up to 100ms, all of them beatable"
+    times = [rng.randint(10, 100) for _ in range(size)]
+    distances = [rng.randrange((time // 2) * (time - time // 2)) for time in times]
+
+    return [
+        f'Time:     {" ".join(f"{time:>5}" for time in times)}\n',
+        f'Distance: {" ".join(f"{distance:>5}" for distance in distances)}\n',
+    ]
+
+
+def camel_cards(size: int, rng: random.Random) -> list[str]:
+    "`size` random hands with bids up to 1000"
+    return [f'{"".join(rng.choices("AKQJT98765432", k=5))} {rng.randint(1, 1000)}\n' for _ in range(size)]
+
+
+def haunted_wasteland(size: int, rng: random.Random) -> list[str]:
+    """
+    A network of about `size` nodes (up to ~40k, the names only have 3 characters) split in 6
+    loops, like the real inputs: every ghost starts in a node ending in A that leads into its
+    loop and ends in the node ending in Z that closes it (AAA and ZZZ for the first one).
+    Both children of the nodes in a loop are the next node, so the ghosts always reach their Z.
+    """
+    alphabet = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+    names = [a + b + c for a in alphabet for b in alphabet for c in alphabet if c not in 'AZ']
+    rng.shuffle(names)
+
+    instructions = ''.join(rng.choices('LR', k=rng.randint(50, 300)))
+    starts = ['AAA'] + [f'{a}{b}A' for a, b in zip(rng.sample(alphabet[1:25], 5), rng.sample(alphabet, 5))]
+    network: dict[str, tuple[str, str]] = {}
+
+    for start in starts:
+        loop = [names.pop() for _ in range(max(1, size // len(starts) + rng.randint(-size // 20, size // 20) - 2))]
+        loop.append('ZZZ' if start == 'AAA' else start[:2] + 'Z')
+        network[start] = (loop[0], loop[0])
+
+        for node, next_node in zip(loop, loop[1:] + loop[:1]):
+            network[node] = (next_node, next_node)
+
+    nodes = list(network.items())
+    rng.shuffle(nodes)
+
+    return [instructions + '\n', '\n'] + [f'{node} = ({left}, {right})\n' for node, (left, right) in nodes]
+
+
+def mirage_maintenance(size: int, rng: random.Random) -> list[str]:
+    "`size` sequences of 21 values of polynomials of degree up to 6"
+    lines = []
+
+    for _ in range(size):
+        coefficients = [rng.randint(-10, 10) for _ in range(rng.randint(1, 7))]
+        values = [sum(c * x ** i for i, c in enumerate(coefficients)) for x in range(-5, 16)]
+        lines.append(' '.join(map(str, values)) + '\n')
+
+    return lines
+
+
+def pipe_maze(size: int, rng: random.Random) -> list[str]:
+    """
+    A `size` x `size` maze. The loop goes around a random tree of cells of a grid with a third of
+    the size: every cell becomes a 3x3 block whose 8 outer tiles form a ring, and every edge of
+    the tree merges the rings of two blocks into one. The center of each block of the tree is
+    enclosed by the loop (so part 2 is the number of cells in the tree) and every tile not in
+    the loop is a random pipe.
+    """
+    size = max(size, 3) # The smallest loop is a single block
+    third = size // 3
+
+    # Randomized DFS from the center that rejects ~30% of the cells (forever) the first time it sees them
+    root = (third // 2, third // 2)
+    tree = {root: root} # { cell: parent }
+    rejected: set[tuple[int, int]] = set()
+    stack = [root]
+
+    while stack:
+        x, y = stack[-1]
+        neighbours = [
+            (nx, ny) for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1))
+            if 0 <= nx < third and 0 <= ny < third and (nx, ny) not in tree and (nx, ny) not in rejected
+        ]
+
+        if not neighbours:
+            stack.pop()
+        elif rng.random() < 0.3:
+            rejected.add(rng.choice(neighbours))
+        else:
+            neighbour = rng.choice(neighbours)
+            tree[neighbour] = (x, y)
+            stack.append(neighbour)
+
+    links: dict[tuple[int, int], set[tuple[int, int]]] = {} # { tile: connected tiles }
+
+    def link(a: tuple[int, int], b: tuple[int, int]):
+        links.setdefault(a, set()).add(b)
+        links.setdefault(b, set()).add(a)
+
+    def unlink(a: tuple[int, int], b: tuple[int, int]):
+        links[a].discard(b)
+        links[b].discard(a)
+
+    ring = [(0, 0), (0, 1), (0, 2), (1, 2), (2, 2), (2, 1), (2, 0), (1, 0)]
+
+    for x, y in tree:
+        for (dx1, dy1), (dx2, dy2) in zip(ring, ring[1:] + ring[:1]):
+            link((3 * x + dx1, 3 * y + dy1), (3 * x + dx2, 3 * y + dy2))
+
+    # Removing an edge of each ring and joining their ends merges them in a single loop. The
+    # right and bottom sides of a block are used with its next blocks and the left and top with
+    # the previous ones, so every edge is only removed once
+    for child, parent in tree.items():
+        if child == parent:
+            continue
+
+        (x, y), (nx, ny) = min(child, parent), max(child, parent)
+
+        if x == nx: # Blocks side by side
+            a1, a2, b1, b2 = (3 * x, 3 * y + 2), (3 * x + 1, 3 * y + 2), (3 * x, 3 * ny), (3 * x + 1, 3 * ny)
+        else: # One on top of the other
+            a1, a2, b1, b2 = (3 * x + 2, 3 * y), (3 * x + 2, 3 * y + 1), (3 * nx, 3 * y), (3 * nx, 3 * y + 1)
+
+        unlink(a1, a2)
+        unlink(b1, b2)
+        link(a1, b1)
+        link(a2, b2)
+
+    pipes = {
+        frozenset([(-1, 0), (1, 0)]): '|',
+        frozenset([(0, -1), (0, 1)]): '-',
+        frozenset([(-1, 0), (0, 1)]): 'L',
+        frozenset([(-1, 0), (0, -1)]): 'J',
+        frozenset([(1, 0), (0, -1)]): '7',
+        frozenset([(1, 0), (0, 1)]): 'F',
+    }
+
+    grid = [[rng.choice('|-LJ7F.') for _ in range(size)] for _ in range(size)]
+
+    for (x, y), neighbours in links.items():
+        grid[x][y] = pipes[frozenset((nx - x, ny - y) for nx, ny in neighbours)]
+
+    start_x, start_y = rng.choice(sorted(links))
+    grid[start_x][start_y] = 'S'
+
+    # Only the two tiles of the loop next to the start can connect to it (not the random ones)
+    for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+        x, y = start_x + dx, start_y + dy
+
+        if 0 <= x < size and 0 <= y < size and (x, y) not in links:
+            grid[x][y] = '.'
+
+    return [''.join(row) + '\n' for row in grid]
+
+
+def comic_expansion(size: int, rng: random.Random) -> list[str]:
+    "A `size` x `size` image with ~2% of galaxies and ~10% of empty rows and columns"
+    empty_rows = set(rng.sample(range(size), k=size // 10))
+    empty_columns = set(rng.sample(range(size), k=size // 10))
+
+    return [
+        ''.join(
+            '#' if x not in empty_rows and y not in empty_columns and rng.random() < 0.02 else '.'
+            for y in range(size)
+        ) + '\n'
+        for x in range(size)
+    ]
+
+
+GENERATORS = { # { name of the day: generator }
+    'day-01-trebuchet': Generator(trebuchet, 'lines', [1_000, 2_000, 4_000, 8_000]),
+    'day-02-cube-conundrum': Generator(cube_conundrum, 'games', [1_000, 2_000, 4_000, 8_000]),
+    'day-03-gear-ratios': Generator(gear_ratios, 'side', [35, 70, 140, 280]),
+    'day-04-scratchcards': Generator(scratchcards, 'cards', [1_000, 2_000, 4_000, 8_000]),
+    'day-05-give-seed-fertilizer': Generator(give_seed_fertilizer, 'width', [10 ** 3, 10 ** 5, 10 ** 7, 10 ** 9]),
+    'day-06-wait-for-it': Generator(wait_for_it, 'races', [4, 16, 64, 256]),
+    'day-07-camel-cards': Generator(camel_cards, 'hands', [1_000, 2_000, 4_000, 8_000]),
+    'day-08-haunted-wasteland': Generator(haunted_wasteland, 'nodes', [800, 1_600, 3_200, 6_400]),
+    'day-09-mirage-maintenance': Generator(mirage_maintenance, 'lines', [1_000, 2_000, 4_000, 8_000]),
+    'day-10-pipe-maze': Generator(pipe_maze, 'side', [35, 70, 140, 280]),
+    'day-11-comic-expansion': Generator(comic_expansion, 'side', [140, 280, 560, 1_120]),
+}
+
+
+def generate(name: str, size: int, seed: int) -> list[str]:
+    return GENERATORS[name].generate(size, random.Random(seed))
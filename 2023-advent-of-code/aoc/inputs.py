@@ -0,0 +1,69 @@
+"""
+The views of the input a solver can read (declared with `runner.register(reads=...)`):
+ - LIST: all the lines in a list, for the solvers that need random access (the default)
+ - LINES: an iterator of lines, so the solvers that only need a line at a time use constant memory
+ - DATA: the raw bytes, memory-mapped when the input is a regular file (even if it's redirected to
+   stdin), so the input is never loaded in memory
+"""
+
+import contextlib
+import io
+import os
+import sys
+
+from collections.abc import Iterator
+
+
+LIST = 'list'
+LINES = 'lines'
+DATA = 'data'
+
+
+@contextlib.contextmanager
+def map_file(f: io.BufferedReader) -> 'Iterator[bytes | mmap.mmap]':
+    "Maps a file in memory (empty files and pipes can't be mapped, so they are just read)"
+    import mmap
+    import stat
+
+    info = os.fstat(f.fileno())
+
+    if not stat.S_ISREG(info.st_mode) or info.st_size == 0:
+        yield f.read()
+        return
+
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        yield data
+
+
+@contextlib.contextmanager
+def open_input(path: str | None, reads: str) -> Iterator[object]:
+    "Opens the input file (or stdin if `path` is None) as the view of the input that a solver reads"
+    if reads == LIST:
+        if path is None:
+            yield sys.stdin.readlines()
+        else:
+            with open(path) as f:
+                yield f.readlines()
+    elif reads == LINES:
+        if path is None:
+            yield sys.stdin
+        else:
+            with open(path) as f:
+                yield f
+    elif reads == DATA:
+        if path is None:
+            with map_file(sys.stdin.buffer) as data:
+                yield data
+        else:
+            with open(path, 'rb') as f, map_file(f) as data:
+                yield data
+    else:
+        raise ValueError(f'Unknown view of the input: {reads}')
+
+
+def from_lines(lines: list[str], reads: str) -> object:
+    "The view of an input that is already in memory (the list itself is a fine iterable of lines)"
+    if reads == DATA:
+        return ''.join(lines).encode()
+
+    return lines
@@ -0,0 +1,129 @@
+"""
+Profiling of a part of a day, with the parse and solve phases reported separately: the top
+functions by cumulative time (cProfile) and the peak memory with the allocation sites responsible
+for it (tracemalloc). Paths are relative and there are no addresses in the reports, so two runs
+can be diffed.
+"""
+
+import cProfile
+import io
+import linecache
+import os
+import pstats
+import sys
+import tracemalloc
+
+from collections.abc import Callable
+
+from aoc import inputs
+from aoc.runner import Solution
+
+
+DEFAULT_TOP = 15
+TRACEBACK_LIMIT = 10
+PEAK_MARGIN = 0.05 # Growth of the traced memory needed to take another snapshot
+
+BASE_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def relative(filename: str) -> str:
+    path = os.path.abspath(filename)
+    return os.path.relpath(path, BASE_DIRECTORY) if path.startswith(BASE_DIRECTORY + os.sep) else filename
+
+
+def profile_time(fn: Callable[[], object], top: int) -> tuple[object, str]:
+    profiler = cProfile.Profile()
+    result = profiler.runcall(fn)
+
+    output = io.StringIO()
+    stats = pstats.Stats(profiler, stream=output)
+    stats.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+
+    return result, output.getvalue().strip('\n')
+
+
+def profile_memory(fn: Callable[[], object], top: int) -> tuple[object, str]:
+    """
+    To find out which allocations are responsible for the peak (even the ones that are freed
+    before the phase ends, like temporary lists) we take a snapshot every time a function returns
+    with more memory traced than ever (by a margin, so we don't take one on every call).
+    """
+    tracemalloc.start(TRACEBACK_LIMIT)
+    peak_snapshot: tracemalloc.Snapshot | None = None
+    peak = 0
+
+    def on_event(frame, event: str, arg):
+        nonlocal peak_snapshot, peak
+
+        if event in ('return', 'c_return'):
+            current, _ = tracemalloc.get_traced_memory()
+
+            if current > peak * (1 + PEAK_MARGIN):
+                peak_snapshot, peak = tracemalloc.take_snapshot(), current
+
+    try:
+        before = tracemalloc.take_snapshot()
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+
+        sys.setprofile(on_event)
+        try:
+            result = fn()
+        finally:
+            sys.setprofile(None)
+
+        _, real_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # Don't blame the profiler itself
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    differences = (peak_snapshot or before).filter_traces(filters).compare_to(before.filter_traces(filters), 'lineno')
+    lines = [f'Peak: {(real_peak - baseline) / 1024:.1f} KB', 'Allocation sites (at the peak):']
+
+    for difference in [d for d in differences if d.size_diff > 0][:top]:
+        frame = difference.traceback[0]
+        lines.append(
+            f'  {relative(frame.filename)}:{frame.lineno}: {difference.size_diff / 1024:.1f} KB '
+            f'({difference.count_diff} blocks): {linecache.getline(frame.filename, frame.lineno).strip()}'
+        )
+
+    return result, '\n'.join(lines)
+
+
+def profile_phase(name: str, fn: Callable[[], object], top: int) -> tuple[object, str]:
+    """
+    Runs the phase under cProfile and under tracemalloc (each one would distort the other), after
+    a warmup run, so the lazy imports (like numpy) and anything cached (like the tables of day 7)
+    are not charged to the phase.
+    """
+    fn()
+    result, time_report = profile_time(fn, top)
+    _, memory_report = profile_memory(fn, top)
+
+    return result, '\n'.join([
+        f'================= {name} =================',
+        f'--------- Time (top {top} by cumulative time) ---------',
+        time_report,
+        '--------- Memory ---------',
+        memory_report,
+        '',
+    ])
+
+
+def profile_part(solution: Solution, problem_input: list[str], part: int, top: int = DEFAULT_TOP) -> str:
+    "Profiles a part of the day (the parse and solve phases separately, when the day supports it)"
+    reports = [f'{solution.name} (part {part})', '']
+    problem_input = inputs.from_lines(problem_input, solution.reads)
+
+    if solution.parses_once:
+        solve = solution.solve_parsed_part1 if part == 1 else solution.solve_parsed_part2
+        parsed, report = profile_phase('parse', lambda: solution.parse(problem_input), top)
+        reports.append(report)
+        result, report = profile_phase('solve', lambda: solve(parsed), top)
+    else:
+        solve = solution.solve_part1 if part == 1 else solution.solve_part2
+        result, report = profile_phase('solve', lambda: solve(problem_input), top)
+
+    reports.extend([report, f'Result: {result}', ''])
+    return '\n'.join(reports)
@@ -0,0 +1,280 @@
+"""
+Shared command line runner of all the days. Every `solution.py` registers its solvers with
+`register` and calls `main` when it's executed, and `run.py` loads any set of days in a single
+interpreter to check them against their expected outputs.
+
+Most of the runs are so short that the startup of the interpreter is a big part of their time,
+so the heavy modules (argparse, timeit, numpy...) are only imported when they are needed. Even
+`typing` is left out of the startup (`python -X importtime ./solution.py --part1` shows it).
+"""
+
+import dataclasses
+import functools
+import importlib
+import logging
+import os
+import sys
+
+from types import ModuleType
+from collections.abc import Callable
+
+from aoc import inputs, trace
+
+
+Solver = Callable[[object], object]
+
+
+@dataclasses.dataclass
+class Mode:
+    """
+    An extra command line mode of a day: `flag` is added to the group of mutually exclusive
+    options (with the argparse `options`) and `run` is called with its value.
+    """
+    flag: str
+    run: Callable[[object], None]
+    options: dict[str, object] = dataclasses.field(default_factory=dict)
+
+
+@dataclasses.dataclass
+class Solution:
+    directory: str
+    solve_part1: Solver
+    solve_part2: Solver
+    parse: Solver | None = None # Parser of the input shared by both parts
+    solve_parsed_part1: Solver | None = None # Solvers of the output of `parse`
+    solve_parsed_part2: Solver | None = None
+    stream_part1: Solver | None = None # Solvers that read the input lazily (for --stream)
+    stream_part2: Solver | None = None
+    modes: list[Mode] = dataclasses.field(default_factory=list)
+    reads: str = inputs.LIST # View of the input that the solvers (and `parse`) read, see `aoc.inputs`
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.directory)
+
+    @property
+    def parses_once(self) -> bool:
+        return self.parse is not None and self.solve_parsed_part1 is not None and self.solve_parsed_part2 is not None
+
+    def solve_both(self, problem_input: object) -> tuple[object, object]:
+        "Solves both parts parsing the input only once (if the day supports it)"
+        if not self.parses_once:
+            if self.reads == inputs.LINES: # An iterator can only be read once
+                problem_input = list(problem_input)
+
+            return self.solve_part1(problem_input), self.solve_part2(problem_input)
+
+        parsed = self.parse(problem_input)
+        return self.solve_parsed_part1(parsed), self.solve_parsed_part2(parsed)
+
+
+SOLUTIONS: dict[str, Solution] = {} # { directory: solution }
+
+DEFAULT_SEED = 2023 # Of the synthetic inputs
+
+
+def register(file: str, solve_part1: Solver, solve_part2: Solver, **kwargs) -> Solution:
+    "Registers the solvers of the day of `file` (its `__file__`)"
+    solution = Solution(os.path.dirname(os.path.abspath(file)), solve_part1, solve_part2, **kwargs)
+    SOLUTIONS[solution.directory] = solution
+    return solution
+
+
+@functools.cache
+def optional_import(name: str) -> ModuleType | None:
+    "Imports a module the first time it's needed (None if it's not installed)"
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+def configure_logging():
+    level = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    logging.basicConfig(level=level)
+
+    # The debug messages of the solutions are trace points, which are skipped unless enabled
+    if level == 'DEBUG':
+        trace.enable()
+
+
+def benchmark(solution: Solution, problem_input: list[str], repeat: int) -> dict[str, object]:
+    "Times every phase of the day on `problem_input` (see `aoc.benchmark`) and prints a summary"
+    from aoc import benchmark as bench
+
+    results = bench.benchmark_solution(solution, problem_input, repeat)
+    bench.print_results(results)
+    return results
+
+
+def main(solution: Solution, argv: list[str] | None = None):
+    "Command line of a single day (reading the input from stdin)"
+    import argparse
+
+    configure_logging()
+    parser = argparse.ArgumentParser(prog='Programming Exercise Runner')
+
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--part1', action='store_const', dest='fn', const=solution.solve_part1)
+    group.add_argument('--part2', action='store_const', dest='fn', const=solution.solve_part2)
+    group.add_argument('--all', action='store_true', help='Solve both parts parsing the input once')
+    modes = [(mode, group.add_argument(mode.flag, **mode.options)) for mode in solution.modes]
+    group.add_argument('--benchmark', nargs='?', type=int, const=10, metavar='REPEAT')
+    group.add_argument('--generate', type=int, metavar='SIZE', help='Print a synthetic input of this size')
+    group.add_argument('--profile', type=int, choices=(1, 2), metavar='PART', help='Profile a part (1 or 2)')
+    parser.add_argument('--profile-output', metavar='FILE', help='Report of --profile (profile-partN.txt by default)')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='Seed of the synthetic input')
+
+    if solution.stream_part1 and solution.stream_part2:
+        parser.add_argument('--stream', action='store_true', help='Read stdin one line at a time')
+
+    args = parser.parse_args(argv)
+
+    if args.fn and getattr(args, 'stream', False):
+        stream_fn = solution.stream_part1 if args.fn is solution.solve_part1 else solution.stream_part2
+        print(stream_fn(sys.stdin))
+    elif args.fn:
+        with inputs.open_input(None, solution.reads) as problem_input:
+            print(args.fn(problem_input))
+    elif args.all:
+        with inputs.open_input(None, solution.reads) as problem_input:
+            for result in solution.solve_both(problem_input):
+                print(result)
+    elif args.benchmark:
+        benchmark(solution, sys.stdin.readlines(), args.benchmark)
+    elif args.generate is not None:
+        from aoc import generators
+
+        sys.stdout.writelines(generators.generate(solution.name, args.generate, args.seed))
+    elif args.profile is not None:
+        from aoc import profiling
+
+        report = profiling.profile_part(solution, sys.stdin.readlines(), args.profile)
+        output = args.profile_output or f'profile-part{args.profile}.txt'
+
+        with open(output, 'w') as f:
+            f.write(report)
+
+        print(report)
+        print(f'Saved to {output}')
+    else:
+        for mode, action in modes:
+            if (value := getattr(args, action.dest)) not in (None, False):
+                mode.run(value)
+
+
+def load(directory: str) -> Solution:
+    "Imports the `solution.py` of a day (that registers itself) and returns its solution"
+    import importlib.util
+
+    directory = os.path.abspath(directory)
+    module_name = os.path.basename(directory).replace('-', '_')
+
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(directory, 'solution.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+
+    return SOLUTIONS[directory]
+
+
+def input_files(directory: str) -> list[str]:
+    return sorted(f for f in os.listdir(directory) if f.startswith('input-') and f.endswith('.txt'))
+
+
+def read_lines(path: str) -> list[str]:
+    with open(path) as f:
+        return f.readlines()
+
+
+def check(solution: Solution) -> bool:
+    """
+    Runs every input of the day with an expected output next to it and compares the results.
+    When both parts have an expected output they are solved together, parsing the input once
+    (some examples are only valid for one of the parts).
+    """
+    all_ok = True
+
+    for input_file in input_files(solution.directory):
+        num = input_file[len('input-'):-len('.txt')]
+        output_files = {
+            part: path
+            for part in (1, 2)
+            if os.path.exists(path := os.path.join(solution.directory, f'output-part{part}-{num}.txt'))
+        }
+        solvers = {1: solution.solve_part1, 2: solution.solve_part2}
+
+        with inputs.open_input(os.path.join(solution.directory, input_file), solution.reads) as problem_input:
+            if len(output_files) == 2:
+                results = dict(zip((1, 2), solution.solve_both(problem_input)))
+            else:
+                results = {part: solvers[part](problem_input) for part in output_files}
+
+        for part, output_file in output_files.items():
+            print(f'--------- Running input-{num} (part {part}) ---------')
+            result = str(results[part])
+            expected = ''.join(read_lines(output_file)).strip()
+
+            if result == expected:
+                print('OK')
+            else:
+                print(f'Expected: {expected}\nGot:      {result}')
+                all_ok = False
+
+    return all_ok
+
+
+def run_days(argv: list[str] | None = None) -> int:
+    "Command line of `run.py`: checks (and benchmarks) any set of days in this interpreter"
+    import argparse
+
+    configure_logging()
+    parser = argparse.ArgumentParser(prog='Programming Exercises Runner')
+    parser.add_argument('days', nargs='+', help='Directories of the days to run')
+    parser.add_argument('--benchmark', nargs='?', type=int, const=10, metavar='REPEAT', help='Benchmark the last input')
+    parser.add_argument('--json', help='Write the results of the benchmark to this file')
+    parser.add_argument('--baseline', help='Compare the benchmark with the results stored in this file')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Slowdown reported as a regression')
+    parser.add_argument('--scaling', nargs='*', type=int, metavar='SIZE',
+                        help='Benchmark synthetic inputs of these sizes (or the default ones of each day)')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='Seed of the synthetic inputs')
+
+    args = parser.parse_args(argv)
+    all_ok = True
+    results = {}
+
+    for directory in args.days:
+        solution = load(directory)
+
+        if len(args.days) > 1:
+            print(f'================= {solution.name} =================')
+
+        all_ok = check(solution) and all_ok
+
+        if args.benchmark:
+            print('----------------- Benchmark -----------------')
+            last_input = input_files(solution.directory)[-1]
+            results[solution.name] = benchmark(
+                solution, read_lines(os.path.join(solution.directory, last_input)), args.benchmark,
+            )
+
+        if args.scaling is not None:
+            from aoc import benchmark as bench, generators
+
+            generator = generators.GENERATORS[solution.name]
+            print('----------------- Scaling -----------------')
+            bench.print_scaling(bench.scaling(solution, args.scaling or generator.sizes, args.seed), generator.size)
+
+    if results and (args.json or args.baseline):
+        from aoc import benchmark as bench
+
+        if args.json:
+            bench.write_json(args.json, results)
+
+        if args.baseline:
+            regressions = bench.compare(results, bench.read_baseline(args.baseline), args.threshold)
+            print('----------------- Regressions -----------------')
+            print('\n'.join(regressions) if regressions else 'None')
+            all_ok = all_ok and not regressions
+
+    return 0 if all_ok else 1
@@ -0,0 +1,59 @@
+"""
+Tracing of the hot paths of the solutions: debug messages and counters of the work done (steps
+walked, tiles traced...) that cost nothing when tracing is disabled.
+
+The solutions check `ENABLED` once (before their loops) instead of formatting a message on every
+iteration, and messages are only formatted when they are actually logged:
+
+    tracing = trace.ENABLED
+
+    for ...:
+        if tracing:
+            trace.count('steps walked', num_steps)
+            trace.debug('node=%s', node)
+"""
+
+import contextlib
+import logging
+import os
+
+from collections import Counter
+from collections.abc import Iterator
+
+
+ENABLED = bool(os.environ.get('TRACE'))
+
+COUNTERS: Counter[str] = Counter()
+
+logger = logging.getLogger('aoc')
+
+
+def debug(msg: str, *args):
+    if ENABLED:
+        logger.debug(msg, *args)
+
+
+def count(counter: str, value: int = 1):
+    if ENABLED:
+        COUNTERS[counter] += value
+
+
+def enable(enabled: bool = True):
+    global ENABLED
+    ENABLED = enabled
+
+
+@contextlib.contextmanager
+def collect() -> Iterator[Counter[str]]:
+    "Enables tracing while in the block and yields the counters increased in it"
+    global ENABLED
+    previous, ENABLED = ENABLED, True
+    COUNTERS.clear()
+    counters: Counter[str] = Counter()
+
+    try:
+        yield counters
+    finally:
+        counters.update(COUNTERS)
+        COUNTERS.clear()
+        ENABLED = previous
@@ -1,78 +1,162 @@
 #!/usr/bin/env python
 
-import argparse
-import logging
+import dataclasses
+import functools
 import os
-import re
 import sys
-import timeit
 
+from collections import deque
 
-logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper())
+# The shared runner lives in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
+from aoc import inputs, runner, trace
 
-def solve_part1(problem_input: list[str]) -> int:
-    result = 0
 
-    for line in problem_input:
-        logging.debug(line.strip())
-        digits = [c for c in line if c.isdigit()]
+DIGITS = {str(value).encode(): value for value in range(10)}
 
-        if len(digits) == 0:
-            continue
+WORDS = {
+    b'one': 1,
+    b'two': 2,
+    b'three': 3,
+    b'four': 4,
+    b'five': 5,
+    b'six': 6,
+    b'seven': 7,
+    b'eight': 8,
+    b'nine': 9,
+}
 
-        result += int(digits[0] + digits[-1])
-        logging.debug(f'result + {digits[0]}{digits[-1]} = {result}')
 
-    return result
+@dataclasses.dataclass
+class Automaton:
+    """
+    Aho-Corasick automaton compiled to a DFA over bytes: `transitions[state][byte]` is the next
+    state and `values[state]` is 1 + the value of the pattern that ends in that state (0 if none).
+    """
+    transitions: list[bytes]
+    values: bytes
+
+
+def build_automaton(patterns: dict[bytes, int]) -> Automaton:
+    # Trie of all the patterns (state 0 is the root)
+    children: list[dict[int, int]] = [{}]
+    values = [0]
+
+    for pattern, value in patterns.items():
+        state = 0
+
+        for byte in pattern:
+            if byte not in children[state]:
+                children[state][byte] = len(children)
+                children.append({})
+                values.append(0)
+            state = children[state][byte]
+
+        values[state] = value + 1
+
+    if len(children) > 256:
+        raise ValueError('Too many states for the automaton')
+
+    # We fill the missing transitions with the ones of the longest suffix (the failure link),
+    # visiting the states in BFS order so the suffix is always complete before it's needed
+    transitions = [bytearray(256) for _ in children]
+    queue = deque([(0, 0)]) # (state, failure state)
+
+    while queue:
+        state, failure = queue.popleft()
+
+        if state != 0:
+            transitions[state][:] = transitions[failure]
+            values[state] = values[state] or values[failure]
+
+        for byte, child in children[state].items():
+            transitions[state][byte] = child
+            queue.append((child, transitions[failure][byte] if state != 0 else 0))
+
+    return Automaton([bytes(t) for t in transitions], bytes(values))
+
+
+@functools.cache
+def automata(with_words: bool) -> tuple[Automaton, Automaton]:
+    "Automata to find the first (forward) and the last (backward, reversed patterns) values"
+    patterns = DIGITS | WORDS if with_words else DIGITS
+    reversed_patterns = {pattern[::-1]: value for pattern, value in patterns.items()}
 
+    return build_automaton(patterns), build_automaton(reversed_patterns)
 
-def solve_part2(problem_input: list[str]) -> int:
-    values = {
-        'one': '1',
-        'two': '2',
-        'three': '3',
-        'four': '4',
-        'five': '5',
-        'six': '6',
-        'seven': '7',
-        'eight': '8',
-        'nine': '9',
-    }
-
-    regex = re.compile(f'(?=({"|".join(values.keys())}|\\d))')
+
+def calibration_sum(data: bytes, forward: Automaton, backward: Automaton) -> int:
+    """
+    For every line, we look for the first value running the `forward` automaton from the left,
+    and for the last one running the automaton of the reversed patterns (`backward`) from the
+    right. Both scans stop at the first match, so we don't read the middle of the lines.
+    """
+    tracing = trace.ENABLED
     result = 0
+    position = 0
+
+    while position < len(data):
+        end = data.find(b'\n', position)
+        end = len(data) if end == -1 else end
+
+        first_value, state = 0, 0
+        for i in range(position, end):
+            state = forward.transitions[state][data[i]]
+            if first_value := forward.values[state]:
+                break
+
+        if tracing:
+            trace.count('lines')
+            trace.count('bytes scanned', i - position + 1 if end > position else 0)
 
-    for line in problem_input:
-        logging.debug(line.strip())
-        digits = regex.findall(line)
+        if first_value:
+            last_value, state = 0, 0
+            for i in range(end - 1, position - 1, -1):
+                state = backward.transitions[state][data[i]]
+                if last_value := backward.values[state]:
+                    break
 
-        if len(digits) == 0:
-            continue
+            result += (first_value - 1) * 10 + (last_value - 1)
 
-        # Transform alpha numbers to real numbers if needed
-        first_value = digits[0] if digits[0].isdigit() else values[digits[0]]
-        last_value = digits[-1] if digits[-1].isdigit() else values[digits[-1]]
+            if tracing:
+                trace.count('bytes scanned', end - i)
+                trace.debug('result + %d%d = %d', first_value - 1, last_value - 1, result)
 
-        result += int(first_value + last_value)
-        logging.debug(f'result + {first_value}{last_value} = {result}')
+        position = end + 1
 
     return result
 
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser(prog='Programming Exercise Runner')
+def parse_input(data: bytes) -> bytes:
+    "The automata run over the raw bytes of the input (memory-mapped if possible), so there is nothing to parse"
+    return data
+
+
+def solve_parsed_part1(data: bytes) -> int:
+    return calibration_sum(data, *automata(with_words=False))
+
 
-    group = parser.add_mutually_exclusive_group(required=True)
-    group.add_argument('--part1', action='store_const', dest='fn', const=solve_part1)
-    group.add_argument('--part2', action='store_const', dest='fn', const=solve_part2)
-    group.add_argument('--benchmark', nargs='?', type=int, const=1)
+def solve_parsed_part2(data: bytes) -> int:
+    return calibration_sum(data, *automata(with_words=True))
 
-    args = parser.parse_args()
 
-    if args.fn:
-        print(args.fn(sys.stdin.readlines()))
-    elif args.benchmark:
-        stdin = sys.stdin.readlines()
-        print('Part 1: %fs' % timeit.timeit(lambda: solve_part1(stdin), number=args.benchmark))
-        print('Part 2: %fs' % timeit.timeit(lambda: solve_part2(stdin), number=args.benchmark))
+def solve_part1(data: bytes) -> int:
+    return solve_parsed_part1(parse_input(data))
+
+
+def solve_part2(data: bytes) -> int:
+    return solve_parsed_part2(parse_input(data))
+
+
+SOLUTION = runner.register(
+    __file__, solve_part1, solve_part2,
+    parse=parse_input,
+    solve_parsed_part1=solve_parsed_part1,
+    solve_parsed_part2=solve_parsed_part2,
+    reads=inputs.DATA,
+)
+
+
+if __name__ == '__main__':
+    runner.main(SOLUTION)
@@ -1,15 +1,13 @@
 #!/usr/bin/env python
 
-import argparse
-import logging
-import math
+import mmap
 import os
-import re
 import sys
-import timeit
 
+# The shared runner lives in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
-logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper())
+from aoc import inputs, runner, trace
 
 
 MY_GAME = {
@@ -18,65 +16,119 @@ MY_GAME = {
     'blue': 14,
 }
 
-CUBES_GROUPS_REGEX = re.compile(r'([\d]+) ([\w]+)[;,]?')
+# Every color has a fixed slot (red, green, blue) and we know its length, so once we see its first
+# letter we can jump over it
+COLORS = ['red', 'green', 'blue']
+COLOR_SLOTS = {ord(color[0]): slot for slot, color in enumerate(COLORS)}
+COLOR_LENGTHS = [len(color) for color in COLORS]
+LIMITS = [MY_GAME[color] for color in COLORS]
+
+LINE_ENDS = b'\r\n' # '\r' ends a game too, and the '\n' after it is skipped as an empty line
+
+
+def scan_games(data: bytes | mmap.mmap) -> tuple[int, int]:
+    """
+    Solves both parts in a single pass over the raw bytes of the input. For every game we only
+    keep the maximum number of cubes of each color (in a fixed array of three slots), which is
+    all we need for both parts: a game is possible if none of them is over the limit, and its
+    power is their product.
+    """
+    tracing = trace.ENABLED
+    part1, part2 = 0, 0
+    maxima = [-1, -1, -1] # -1 if the color hasn't been seen in the game
+    position, size = 0, len(data)
+
+    while position < size:
+        if data[position] in LINE_ENDS: # Empty line
+            position += 1
+            continue
+
+        # "Game <id>: "
+        colon = data.find(b':', position)
+        game_id = int(data[position + len('Game '):colon])
+        position = colon + 2
+        maxima[0] = maxima[1] = maxima[2] = -1
+
+        # "<num> <color>" groups, separated by ", " or "; "
+        while True:
+            num = 0
+            while 48 <= data[position] <= 57: # Digits
+                num = num * 10 + data[position] - 48
+                position += 1
+
+            slot = COLOR_SLOTS.get(data[position + 1])
+            if slot is None:
+                raise ValueError(f'Invalid color in game {game_id}')
+
+            if num > maxima[slot]:
+                maxima[slot] = num
+
+            position += 1 + COLOR_LENGTHS[slot]
+
+            if position >= size or data[position] in LINE_ENDS:
+                position += 1
+                break
 
+            position += 2
 
-def solve_part1(problem_input: list[str]) -> int:
-    result = 0
+        if maxima[0] <= LIMITS[0] and maxima[1] <= LIMITS[1] and maxima[2] <= LIMITS[2]:
+            part1 += game_id
 
-    for line in problem_input:
-        logging.debug(line.strip())
+        power = 1
+        for maximum in maxima:
+            if maximum != -1:
+                power *= maximum
 
-        # It seems game_id is incremental, but lets extract it just in case
-        game_id, rest = line.split(': ')
-        game_id = int(game_id[len('Game '):])
+        part2 += power
 
-        cubes_groups = CUBES_GROUPS_REGEX.findall(rest)
-        possible = True
+        if tracing:
+            trace.count('games')
+            trace.debug('Game: ID[%d], Max[%s]', game_id, maxima)
 
-        for cubes in cubes_groups:
-            if MY_GAME.get(cubes[1], 0) < int(cubes[0]):
-                logging.debug(f'Invalid Game: ID[{game_id}], Problem[{cubes}]')
-                possible = False
-                break
+    return part1, part2
 
-        if possible:
-            logging.debug(f'Valid Game: ID[{game_id}]')
-            result += game_id
 
-    return result
+def scan_file(path: str) -> tuple[int, int]:
+    "Same as `scan_games` but reading the file through mmap (so it never loads it in memory)"
+    with inputs.open_input(path, inputs.DATA) as data:
+        return scan_games(data)
 
 
-def solve_part2(problem_input: list[str]) -> int:
-    result = 0
+def parse_input(data: bytes | mmap.mmap) -> tuple[int, int]:
+    "The scanner solves both parts while it parses the games, so its totals are all we keep"
+    return scan_games(data)
 
-    for line in problem_input:
-        logging.debug(line.strip())
 
-        cubes_groups = CUBES_GROUPS_REGEX.findall(line.split(': ')[1])
-        min_cubes = {} # { color: min_num_of_cubes }
+def solve_parsed_part1(totals: tuple[int, int]) -> int:
+    return totals[0]
 
-        for cubes in cubes_groups:
-            min_cubes[cubes[1]] = max(min_cubes.get(cubes[1], 0), int(cubes[0]))
 
-        result += math.prod(min_cubes.values())
+def solve_parsed_part2(totals: tuple[int, int]) -> int:
+    return totals[1]
 
-    return result
 
+def solve_part1(data: bytes | mmap.mmap) -> int:
+    return solve_parsed_part1(parse_input(data))
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser(prog='Programming Exercise Runner')
 
-    group = parser.add_mutually_exclusive_group(required=True)
-    group.add_argument('--part1', action='store_const', dest='fn', const=solve_part1)
-    group.add_argument('--part2', action='store_const', dest='fn', const=solve_part2)
-    group.add_argument('--benchmark', nargs='?', type=int, const=1)
+def solve_part2(data: bytes | mmap.mmap) -> int:
+    return solve_parsed_part2(parse_input(data))
+
 
-    args = parser.parse_args()
+def print_file(path: str):
+    for result in scan_file(path):
+        print(result)
 
-    if args.fn:
-        print(args.fn(sys.stdin.readlines()))
-    elif args.benchmark:
-        stdin = sys.stdin.readlines()
-        print('Part 1: %fs' % timeit.timeit(lambda: solve_part1(stdin), number=args.benchmark))
-        print('Part 2: %fs' % timeit.timeit(lambda: solve_part2(stdin), number=args.benchmark))
+
+SOLUTION = runner.register(
+    __file__, solve_part1, solve_part2,
+    parse=parse_input,
+    solve_parsed_part1=solve_parsed_part1,
+    solve_parsed_part2=solve_parsed_part2,
+    modes=[runner.Mode('--file', print_file, {'help': 'Solve both parts reading the file through mmap'})],
+    reads=inputs.DATA,
+)
+
+
+if __name__ == '__main__':
+    runner.main(SOLUTION)
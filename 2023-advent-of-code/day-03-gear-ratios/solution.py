@@ -1,136 +1,228 @@
 #!/usr/bin/env python
 
-import argparse
 import dataclasses
-import logging
 import os
+import re
 import sys
-import timeit
 
-from typing import Optional
+from collections.abc import Iterable
 
+# The shared runner lives in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
-logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper())
+from aoc import runner, trace
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class Number:
     value: int
     length: int
     x: int
     y: int
-    valid: Optional[bool]
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class Symbol:
     value: str
     x: int
     y: int
 
 
-def parse_input(problem_input: list[str]) -> tuple[dict[int, list[Number]], list[Symbol]]:
+@dataclasses.dataclass
+class Schematic:
+    """
+    Apart from the numbers and symbols, we keep an index of the whole grid: `cells[x * width + y]`
+    is the position in `numbers` of the number covering the cell (x, y), or -1 if there is none.
+    """
+    numbers: list[Number]
+    symbols: list[Symbol]
+    width: int
+    height: int
+    cells: list[int]
+
+
+@dataclasses.dataclass(slots=True)
+class Row:
     """
-    We parse the input by separately storing in a tuple all the symbols 
-    and numbers we see. The numbers are stored in a dictionary with the row where 
-    they are located as its key, as it will help us optimise later how many 
-    checks we have to do. We also store along both numbers and symbols the position (x,y)
-    were they were found to help us solving both parts of the exercise.
+    A single row of the schematic: `cells[y]` is the position in `numbers` of the number covering
+    the column `y` (or -1) and `symbol_cells[y]` is 1 if there is a symbol in it.
     """
-    numbers: dict[int, list[Number]] = {} # { row_num: [num1, num2, num3, ...]}
-    symbols: list[Symbol] = [] # [ symbol1, symbol2, ...]
+    numbers: list[Number]
+    symbols: list[Symbol]
+    cells: list[int]
+    symbol_cells: bytearray
+
+
+EMPTY_ROW = Row([], [], [], bytearray())
+
+NUMBER_REGEX = re.compile(r'\d+')
+SYMBOL_CANDIDATE_REGEX = re.compile(r'[^.\d]')
+
+
+def parse_row(nline: int, line: str, index: bool = True) -> Row:
+    "Without `index`, only the numbers and symbols are parsed (`cells` and `symbol_cells` stay empty)"
+    numbers: list[Number] = []
+    symbols: list[Symbol] = []
+    cells = [-1] * len(line) if index else []
+    symbol_cells = bytearray(len(line) if index else 0)
+
+    for match in NUMBER_REGEX.finditer(line):
+        if index:
+            cells[match.start():match.end()] = [len(numbers)] * len(match[0])
+        numbers.append(Number(int(match[0]), len(match[0]), nline, match.start()))
+
+    # Anything printable that is not a digit, a letter or a "." is a symbol
+    for match in SYMBOL_CANDIDATE_REGEX.finditer(line):
+        char = match[0]
+
+        if char.isprintable() and not char.isalpha():
+            symbols.append(Symbol(char, nline, match.start()))
+
+            if index:
+                symbol_cells[match.start()] = 1
+
+    return Row(numbers, symbols, cells, symbol_cells)
+
+
+def parse_input(problem_input: list[str]) -> Schematic:
+    """
+    We parse the input by separately storing all the symbols and numbers we see, along with the
+    position (x,y) were they were found. Every cell covered by a number points to it in `cells`,
+    so we can find the numbers around a symbol just by looking at its 8 neighbours.
+    """
+    numbers: list[Number] = []
+    symbols: list[Symbol] = []
+
+    height = len(problem_input)
+    width = max((len(line) for line in problem_input), default=0)
+    cells = [-1] * (width * height)
 
-    # We iterate line by line and char by char to find the digits and symbols:
-    #  - If we see a symbol we just store it in `symbols` with its location (x, y)
-    #  - If we see a number we'll store digit by digit all its value in `num_buffer` and we'll
-    #    store in `found_x` and `found_y` the position (x,y) of its first digit
     for nline, line in enumerate(problem_input):
-        num_buffer, found_x, found_y = '', 0, 0
+        row = parse_row(nline, line, index=False) # The index of the whole grid is built here
+        row_start = nline * width
 
-        for nchar, char in enumerate(line):
-            if char.isnumeric():
-                # If `num_buffer` is empty it means it's the first digit of a new number 
-                # so we store its location (x, y)
-                if len(num_buffer) == 0:
-                    found_x = nline
-                    found_y = nchar
+        for number in row.numbers:
+            cells[row_start + number.y:row_start + number.y + number.length] = [len(numbers)] * number.length
+            numbers.append(number)
 
-                num_buffer += char
-            else:
-                # If we see a non-digit and `num_buffer` is not empty it means we finished
-                # a number, so we store it in our list of numbers and continue
-                if len(num_buffer) != 0:
-                    found_num = Number(int(num_buffer), len(num_buffer), found_x, found_y, None)
-                    logging.debug(f'Found: {found_num}')
+        symbols.extend(row.symbols)
 
-                    numbers.setdefault(nline, []).append(found_num)
-                    num_buffer = ''
+    return Schematic(numbers, symbols, width, height, cells)
 
-                # Now we see if this non-digit is a symbol
-                if char.isprintable() and not char.isalpha() and char != '.':
-                    found_symbol = Symbol(char, nline, nchar)
-                    logging.debug(f'Found: {found_symbol}')
 
-                    symbols.append(found_symbol)
+def adjacent_numbers(schematic: Schematic, symbol: Symbol) -> set[int]:
+    "Positions in `numbers` of all the numbers touching the symbol (a number can touch it twice)"
+    result: set[int] = set()
 
-    return numbers, symbols
+    for x in range(max(0, symbol.x - 1), min(schematic.height, symbol.x + 2)):
+        row_start = x * schematic.width
 
+        for y in range(max(0, symbol.y - 1), min(schematic.width, symbol.y + 2)):
+            if (number_id := schematic.cells[row_start + y]) != -1:
+                result.add(number_id)
+
+    return result
 
-def solve_part1(problem_input: list[str]) -> int:
-    numbers, symbols = parse_input(problem_input)
 
-    for symbol in symbols:
-        # We only check numbers in the 3 closest rows as further away it cannot touch the symbol
-        for row_offset in [-1, 0, 1]:
-            for number in numbers.get(symbol.x + row_offset, []):
-                if (number.y - 1) <= symbol.y < (number.y + number.length + 1):
-                    logging.debug(f'Match: [{symbol}, {number}]')
-                    number.valid = True
+def solve_parsed_part1(schematic: Schematic) -> int:
+    # A number can touch several symbols, so we collect all the parts before adding them up
+    part_numbers = {
+        number_id
+        for symbol in schematic.symbols
+        for number_id in adjacent_numbers(schematic, symbol)
+    }
 
+    trace.count('symbols checked', len(schematic.symbols))
+    trace.count('part numbers', len(part_numbers))
+    return sum(schematic.numbers[number_id].value for number_id in part_numbers)
+
+
+def solve_parsed_part2(schematic: Schematic) -> int:
     result = 0
+    gears = 0
 
-    # We check all the parts that have been matched to calculate the result
-    for row in numbers.values():
-        for number in row:
-            if number.valid:
-                result += number.value
+    for symbol in schematic.symbols:
+        matches = [schematic.numbers[number_id] for number_id in adjacent_numbers(schematic, symbol)]
 
+        if len(matches) == 2:
+            result += matches[0].value * matches[1].value
+            gears += 1
+
+    trace.count('symbols checked', len(schematic.symbols))
+    trace.count('gears', gears)
     return result
 
 
+def solve_part1(problem_input: list[str]) -> int:
+    return solve_parsed_part1(parse_input(problem_input))
+
+
 def solve_part2(problem_input: list[str]) -> int:
-    numbers, symbols = parse_input(problem_input)
-    result = 0
+    return solve_parsed_part2(parse_input(problem_input))
+
 
-    for symbol in symbols:
-        matches: list[Number] = []
+def finalize_row(above: Row, row: Row, below: Row) -> tuple[int, int]:
+    "Part numbers and gear ratios of `row`, once we know the rows around it"
+    window = (above, row, below)
+    part_numbers, gear_ratios = 0, 0
 
-        # We only check numbers in the 3 closest rows as further away it cannot touch the symbol
-        for row_offset in [-1, 0, 1]:
-            for number in numbers.get(symbol.x + row_offset, []):
-                if (number.y - 1) <= symbol.y < (number.y + number.length + 1):
-                    logging.debug(f'Match: [{symbol}, {number}]')
-                    matches.append(number)
+    for number in row.numbers:
+        start, end = max(0, number.y - 1), number.y + number.length + 1
+
+        if any(r.symbol_cells.find(1, start, end) != -1 for r in window):
+            part_numbers += number.value
+
+    for symbol in row.symbols:
+        # Numbers are identified by (row in the window, position in the row)
+        matches = {
+            (i, r.cells[y])
+            for i, r in enumerate(window)
+            for y in range(max(0, symbol.y - 1), min(len(r.cells), symbol.y + 2))
+            if r.cells[y] != -1
+        }
 
         if len(matches) == 2:
-            result += matches[0].value * matches[1].value
+            (i1, n1), (i2, n2) = matches
+            gear_ratios += window[i1].numbers[n1].value * window[i2].numbers[n2].value
 
-    return result
+    return part_numbers, gear_ratios
 
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser(prog='Programming Exercise Runner')
+def solve_stream(problem_input: Iterable[str]) -> tuple[int, int]:
+    """
+    Solves both parts reading one line at a time. A number or a symbol can only touch the rows
+    right above and below, so a row is finished as soon as we read the next one and we only need
+    to keep three rows in memory.
+    """
+    above, row = EMPTY_ROW, None
+    part1, part2 = 0, 0
+
+    for nline, line in enumerate(problem_input):
+        below = parse_row(nline, line)
 
-    group = parser.add_mutually_exclusive_group(required=True)
-    group.add_argument('--part1', action='store_const', dest='fn', const=solve_part1)
-    group.add_argument('--part2', action='store_const', dest='fn', const=solve_part2)
-    group.add_argument('--benchmark', nargs='?', type=int, const=1)
+        if row is not None:
+            part_numbers, gear_ratios = finalize_row(above, row, below)
+            part1, part2 = part1 + part_numbers, part2 + gear_ratios
+            above = row
 
-    args = parser.parse_args()
+        row = below
 
-    if args.fn:
-        print(args.fn(sys.stdin.readlines()))
-    elif args.benchmark:
-        stdin = sys.stdin.readlines()
-        print('Part 1: %fs' % timeit.timeit(lambda: solve_part1(stdin), number=args.benchmark))
-        print('Part 2: %fs' % timeit.timeit(lambda: solve_part2(stdin), number=args.benchmark))
+    if row is not None:
+        part_numbers, gear_ratios = finalize_row(above, row, EMPTY_ROW)
+        part1, part2 = part1 + part_numbers, part2 + gear_ratios
+
+    return part1, part2
+
+
+SOLUTION = runner.register(
+    __file__, solve_part1, solve_part2,
+    parse=parse_input,
+    solve_parsed_part1=solve_parsed_part1,
+    solve_parsed_part2=solve_parsed_part2,
+    stream_part1=lambda lines: solve_stream(lines)[0],
+    stream_part2=lambda lines: solve_stream(lines)[1],
+)
+
+
+if __name__ == '__main__':
+    runner.main(SOLUTION)
@@ -1,80 +1,105 @@
 #!/usr/bin/env python
 
-import argparse
 import dataclasses
-import logging
 import os
 import sys
-import timeit
 
+from collections import deque
+from collections.abc import Iterable, Iterator
 
-logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper())
+# The shared runner lives in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
+from aoc import inputs, runner, trace
 
-@dataclasses.dataclass
+
+@dataclasses.dataclass(slots=True)
 class Scratchcard:
-    winners: list[int]
-    my_numbers: list[int]
+    """
+    The numbers of each side are stored as a bitmask (the number `n` is the bit `n`), so the card
+    is just two ints and we can intersect both sides with a single `&`.
+    """
+    winners: int
+    my_numbers: int
 
 
-def parse_input(problem_input: list[str]) -> list[Scratchcard]:
-    result = []
+def to_bitmask(numbers: str) -> int:
+    result = 0
 
-    for row in problem_input:
-        splitted = row.split(': ')[1].split(' | ')
+    for n in numbers.split():
+        result |= 1 << int(n)
 
-        winners = [int(n) for n in splitted[0].strip().split(' ') if n != '']
-        my_numbers = [int(n) for n in splitted[1].strip().split(' ') if n != '']
+    return result
 
-        scratchcard = Scratchcard(winners, my_numbers)
-        result.append(scratchcard)
-        logging.debug(scratchcard)
 
-    return result
+def parse_card(row: str) -> Scratchcard:
+    winners, my_numbers = row.split(': ')[1].split(' | ')
+    return Scratchcard(to_bitmask(winners), to_bitmask(my_numbers))
+
+
+def parse_input(problem_input: Iterable[str]) -> Iterator[Scratchcard]:
+    "Parses the cards lazily, one line at a time"
+    return (parse_card(row) for row in problem_input if row.strip())
 
 
 def num_matches(sc: Scratchcard) -> int:
     'Calculates how many of my cards are also in the winning deck'
-    return len(set(sc.winners).intersection(set(sc.my_numbers)))
+    return (sc.winners & sc.my_numbers).bit_count()
 
 
-def solve_part1(problem_input: list[str]) -> int:
+def solve_parsed_part1(scratchcards: Iterable[Scratchcard]) -> int:
     result = 0
 
-    for scratchcard in parse_input(problem_input):
+    for scratchcard in scratchcards:
         result += int(2 ** (num_matches(scratchcard) - 1))
 
     return result
 
 
-def solve_part2(problem_input: list[str]) -> int:
-    scratchcards = parse_input(problem_input)
-    num_scratchcards = [1] * len(scratchcards)
+def solve_parsed_part2(scratchcards: Iterable[Scratchcard]) -> int:
+    """
+    A card can only win copies of the next `num_matches` cards, so we only need to remember the
+    pending copies of the next few cards: `pending[0]` are the extra copies of the current card,
+    `pending[1]` of the next one, etc. It never grows longer than the number of winning numbers.
+    """
+    tracing = trace.ENABLED
+    pending: deque[int] = deque()
+    result = 0
 
     for card_no, scratchcard in enumerate(scratchcards):
+        copies = 1 + (pending.popleft() if pending else 0)
+        result += copies
+
         num = num_matches(scratchcard)
+        pending.extend([0] * (num - len(pending)))
+
+        for i in range(num):
+            pending[i] += copies
 
-        for i in range(card_no + 1, min(card_no + num, len(scratchcards)) + 1):
-            num_scratchcards[i] += num_scratchcards[card_no]
+        if tracing:
+            trace.count('cards')
+            trace.count('pending updates', num)
+            trace.debug('Scratchcard[%d] = %d', card_no + 1, copies)
 
-        logging.debug(f'Scratchcard[{card_no + 1}] = {num_scratchcards}')
+    return result
 
-    return sum(num_scratchcards)
 
+def solve_part1(problem_input: Iterable[str]) -> int:
+    return solve_parsed_part1(parse_input(problem_input))
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser(prog='Programming Exercise Runner')
 
-    group = parser.add_mutually_exclusive_group(required=True)
-    group.add_argument('--part1', action='store_const', dest='fn', const=solve_part1)
-    group.add_argument('--part2', action='store_const', dest='fn', const=solve_part2)
-    group.add_argument('--benchmark', nargs='?', type=int, const=1)
+def solve_part2(problem_input: Iterable[str]) -> int:
+    return solve_parsed_part2(parse_input(problem_input))
 
-    args = parser.parse_args()
 
-    if args.fn:
-        print(args.fn(sys.stdin.readlines()))
-    elif args.benchmark:
-        stdin = sys.stdin.readlines()
-        print('Part 1: %fs' % timeit.timeit(lambda: solve_part1(stdin), number=args.benchmark))
-        print('Part 2: %fs' % timeit.timeit(lambda: solve_part2(stdin), number=args.benchmark))
+SOLUTION = runner.register(
+    __file__, solve_part1, solve_part2,
+    parse=lambda lines: list(parse_input(lines)),
+    solve_parsed_part1=solve_parsed_part1,
+    solve_parsed_part2=solve_parsed_part2,
+    reads=inputs.LINES, # Both parts already stream stdin, one card at a time
+)
+
+
+if __name__ == '__main__':
+    runner.main(SOLUTION)
@@ -1,20 +1,23 @@
 #!/usr/bin/env python
 
-import argparse
+import bisect
 import dataclasses
 import logging
 import os
 import re
 import sys
-import timeit
 
+# The shared runner lives in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
-logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper())
+from aoc import runner, trace
 
 
 CATEGORY_REGEX = re.compile(r'^([\w]+)-to-([\w]+) map:$')
 AMOUNTS_REGEX = re.compile(r'^([\d]+) ([\d]+) ([\d]+)$')
 
+SeedRange = tuple[int, int] # [start, end)
+
 
 @dataclasses.dataclass
 class Transformer:
@@ -36,6 +39,16 @@ class Input:
     categories: list[Category]
 
 
+@dataclasses.dataclass
+class PiecewiseMap:
+    """
+    A piecewise-linear function over the non-negative integers: every value in
+    [starts[i], starts[i+1]) is shifted by offsets[i]. The last piece has no end.
+    """
+    starts: list[int]
+    offsets: list[int]
+
+
 def parse_input(problem_input: list[str]) -> Input:
     seeds = [int(s) for s in problem_input[0].strip()[len('seeds: '):].split(' ')]
 
@@ -69,58 +82,179 @@ def parse_input(problem_input: list[str]) -> Input:
     return Input(seeds, categories)
 
 
-def solve_part1(problem_input: list[str]) -> int:
-    parsed = parse_input(problem_input)
-    locations = []
-
-    for seed in parsed.seeds:
-        val = seed
-        for category in parsed.categories:
-            for transformer in category.transformers:
-                if val >= transformer.source_start and val < (transformer.source_start + transformer.length):
-                    old_val = val
-                    val = transformer.destination_start + ( val - transformer.source_start)
-                    logging.debug(f'{category.destination} {transformer} {old_val} -> {val}')
-                    break
-
-        locations.append(val)
-
-    logging.debug(locations)
-    return min(locations)
+def uncovered(pieces: list[tuple[int, int, int]], start: int, end: int) -> list[SeedRange]:
+    "The parts of [start, end) not covered by any of the (sorted and disjoint) pieces"
+    gaps: list[SeedRange] = []
 
+    for piece_start, piece_end, _ in pieces:
+        if piece_end <= start:
+            continue
+        if piece_start >= end:
+            break
+        if piece_start > start:
+            gaps.append((start, piece_start))
+        start = max(start, piece_end)
+
+    if start < end:
+        gaps.append((start, end))
+
+    return gaps
+
+
+def category_map(category: Category) -> PiecewiseMap:
+    """
+    Converts the transformers of a category to a piecewise map (filling the gaps with offset 0).
+    If several transformers overlap, the first one listed wins (as in `transform_ranges`), so each
+    transformer only covers what the previous ones left uncovered.
+    """
+    pieces: list[tuple[int, int, int]] = [] # (start, end, offset), sorted and disjoint
+
+    for transformer in category.transformers:
+        source_end = transformer.source_start + transformer.length
+        offset = transformer.destination_start - transformer.source_start
+
+        for start, end in uncovered(pieces, transformer.source_start, source_end):
+            bisect.insort(pieces, (start, end, offset))
+
+    starts: list[int] = []
+    offsets: list[int] = []
+    cursor = 0
+
+    for start, end, offset in pieces:
+        if start > cursor:
+            starts.append(cursor)
+            offsets.append(0)
+
+        starts.append(start)
+        offsets.append(offset)
+        cursor = end
+
+    starts.append(cursor)
+    offsets.append(0)
+
+    return PiecewiseMap(starts, offsets)
+
+
+def compose(first: PiecewiseMap, second: PiecewiseMap) -> PiecewiseMap:
+    """
+    Builds the map equivalent to applying `first` and then `second`. The image of every piece
+    of `first` is split at the breakpoints of `second` it crosses, and consecutive pieces that
+    end up with the same offset are merged back together.
+    """
+    starts: list[int] = []
+    offsets: list[int] = []
+
+    def add_piece(start: int, offset: int):
+        if not offsets or offsets[-1] != offset:
+            starts.append(start)
+            offsets.append(offset)
+
+    for i, (start, offset) in enumerate(zip(first.starts, first.offsets)):
+        end = first.starts[i+1] if i + 1 < len(first.starts) else None
+        j = bisect.bisect_right(second.starts, start + offset) - 1
+        add_piece(start, offset + second.offsets[j])
+
+        # Breakpoints of `second` that fall inside the image of this piece
+        for k in range(j + 1, len(second.starts)):
+            if end is not None and second.starts[k] >= end + offset:
+                break
+            add_piece(second.starts[k] - offset, offset + second.offsets[k])
+
+    return PiecewiseMap(starts, offsets)
 
-# FIXME: It's too slow, it takes 1h to resolve
-def solve_part2(problem_input: list[str]) -> int:
-    parsed = parse_input(problem_input)
-    locations = []
 
-    for i in range(0, len(parsed.seeds), 2):
-        for seed in range(parsed.seeds[i], parsed.seeds[i] + parsed.seeds[i+1]):
-            val = seed
-            for category in parsed.categories:
-                for transformer in category.transformers:
-                    if val >= transformer.source_start and val < (transformer.source_start + transformer.length):
-                        val = transformer.destination_start + ( val - transformer.source_start)
-                        break
+def compile_seed_map(parsed: Input) -> PiecewiseMap:
+    "Composes all the categories into a single map that goes straight from seed to location"
+    seed_map = PiecewiseMap([0], [0])
 
-            locations.append(val)
+    for category in parsed.categories:
+        seed_map = compose(seed_map, category_map(category))
 
+    trace.debug('Seed map with %d pieces', len(seed_map.starts))
+    return seed_map
+
+
+def locate_seeds(seed_map: PiecewiseMap, seeds: list[int]) -> list[int]:
+    "Batch lookup of the location of every seed (a binary search per seed)"
+    starts, offsets = seed_map.starts, seed_map.offsets
+    bisect_right = bisect.bisect_right
+
+    trace.count('seed lookups', len(seeds))
+    return [seed + offsets[bisect_right(starts, seed) - 1] for seed in seeds]
+
+
+def solve_parsed_part1(parsed: Input) -> int:
+    locations = locate_seeds(compile_seed_map(parsed), parsed.seeds)
+
+    trace.debug('locations=%s', locations)
     return min(locations)
 
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser(prog='Programming Exercise Runner')
+def transform_ranges(ranges: list[SeedRange], category: Category) -> list[SeedRange]:
+    """
+    Pushes whole [start, end) intervals through the transformers of a category. Every interval
+    is split at the edges of the transformers it overlaps: the overlapping pieces are shifted as a
+    block and the leftovers are checked against the rest of transformers. Whatever is left at the
+    end is not covered by any transformer, so it keeps its values.
+    """
+    tracing = trace.ENABLED
+    result: list[SeedRange] = []
+    pending = ranges
+
+    for transformer in category.transformers:
+        if tracing:
+            trace.count('transformer probes', len(pending))
+
+        source_end = transformer.source_start + transformer.length
+        offset = transformer.destination_start - transformer.source_start
+        unmatched: list[SeedRange] = []
+
+        for start, end in pending:
+            # The part before and after the transformer stays pending
+            if start < transformer.source_start:
+                unmatched.append((start, min(end, transformer.source_start)))
+            if end > source_end:
+                unmatched.append((max(start, source_end), end))
+
+            # The overlapping part (if any) is mapped as a block
+            overlap_start, overlap_end = max(start, transformer.source_start), min(end, source_end)
+            if overlap_start < overlap_end:
+                result.append((overlap_start + offset, overlap_end + offset))
+
+        pending = unmatched
+
+    return result + pending
 
-    group = parser.add_mutually_exclusive_group(required=True)
-    group.add_argument('--part1', action='store_const', dest='fn', const=solve_part1)
-    group.add_argument('--part2', action='store_const', dest='fn', const=solve_part2)
-    group.add_argument('--benchmark', nargs='?', type=int, const=1)
 
-    args = parser.parse_args()
+def solve_parsed_part2(parsed: Input) -> int:
+    ranges: list[SeedRange] = [
+        (parsed.seeds[i], parsed.seeds[i] + parsed.seeds[i+1])
+        for i in range(0, len(parsed.seeds), 2)
+        if parsed.seeds[i+1] > 0
+    ]
 
-    if args.fn:
-        print(args.fn(sys.stdin.readlines()))
-    elif args.benchmark:
-        stdin = sys.stdin.readlines()
-        print('Part 1: %fs' % timeit.timeit(lambda: solve_part1(stdin), number=args.benchmark))
-        print('Part 2: %fs' % timeit.timeit(lambda: solve_part2(stdin), number=args.benchmark))
+    for category in parsed.categories:
+        ranges = transform_ranges(ranges, category)
+        trace.debug('%s %s', category.destination, ranges)
+
+    return min(start for start, _ in ranges)
+
+
+def solve_part1(problem_input: list[str]) -> int:
+    return solve_parsed_part1(parse_input(problem_input))
+
+
+def solve_part2(problem_input: list[str]) -> int:
+    return solve_parsed_part2(parse_input(problem_input))
+
+
+SOLUTION = runner.register(
+    __file__, solve_part1, solve_part2,
+    parse=parse_input,
+    solve_parsed_part1=solve_parsed_part1,
+    solve_parsed_part2=solve_parsed_part2,
+)
+
+
+if __name__ == '__main__':
+    runner.main(SOLUTION)
@@ -1,65 +1,104 @@
 #!/usr/bin/env python
 
-import argparse
-import logging
 import math
 import os
 import sys
-import timeit
 
+from collections.abc import Iterable
 
-logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper())
+# The shared runner lives in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
+from aoc import runner, trace
 
-def solve_part1(problem_input: list[str]) -> int:
-    times = [int(t) for t in problem_input[0].split()[1:]]
-    distances = [int(d) for d in problem_input[1].split()[1:]]
-    result = []
 
-    logging.debug(f'times={times}, distances={distances}')
+def ways_to_win(time: int, distance: int) -> int:
+    """
+    Holding the button `i` ms wins when (time - i) * i > distance, that is, when `i` lies strictly
+    between the roots of i^2 - time*i + distance. We compute the lower root with exact integer
+    arithmetic (`math.isqrt`) and fix its rounding by checking its neighbours, so it works with
+    numbers of any size. The upper bound is symmetric: time - lower.
+    """
+    discriminant = time * time - 4 * distance
+
+    if discriminant <= 0:
+        return 0
+
+    lower = (time - math.isqrt(discriminant)) // 2
+
+    # isqrt rounds down, so the first winning hold can be off by one in either direction. Holding
+    # the button 0ms never moves the boat, and if the middle of the race (the best hold) doesn't
+    # win, nothing will
+    while lower > 1 and (time - (lower - 1)) * (lower - 1) > distance:
+        lower -= 1
+
+    lower = max(1, lower)
 
-    for time, distance in zip(times, distances):
-        options_to_win = 0
+    while lower < time // 2 and (time - lower) * lower <= distance:
+        lower += 1
 
-        for i in range(1, time):
-            if (time - i) * i > distance:
-                options_to_win += 1
+    if (time - lower) * lower <= distance:
+        return 0
 
-        result.append(options_to_win)
+    upper = time - lower
+    return upper - lower + 1
 
-    logging.debug(f'result={result}')
+
+def parse_input(problem_input: list[str]) -> tuple[list[str], list[str]]:
+    "The digits of the times and of the distances: part 2 joins them instead of splitting"
+    return problem_input[0].split()[1:], problem_input[1].split()[1:]
+
+
+def solve_parsed_part1(races: tuple[list[str], list[str]]) -> int:
+    times = [int(t) for t in races[0]]
+    distances = [int(d) for d in races[1]]
+    result = [ways_to_win(time, distance) for time, distance in zip(times, distances)]
+
+    trace.count('races', len(times))
+    trace.debug('times=%s, distances=%s, result=%s', times, distances, result)
     return math.prod(result)
 
 
-# FIXME: It takes 2s, there is probably a better way of solving it
+def solve_parsed_part2(races: tuple[list[str], list[str]]) -> int:
+    time = int(''.join(races[0]))
+    distance = int(''.join(races[1]))
+    options_to_win = ways_to_win(time, distance)
+
+    trace.count('races')
+    trace.debug('time=%d, distance=%d, options_to_win=%d', time, distance, options_to_win)
+    return options_to_win
+
+
+def solve_part1(problem_input: list[str]) -> int:
+    return solve_parsed_part1(parse_input(problem_input))
+
+
 def solve_part2(problem_input: list[str]) -> int:
-    time = int(problem_input[0][len('Time:'):].replace(' ', ''))
-    distance = int(problem_input[1][len('Distance:'):].replace(' ', ''))
+    return solve_parsed_part2(parse_input(problem_input))
 
-    logging.debug(f'time={time}, distance={distance}')
-    options_to_win = 0
 
-    for i in range(1, time):
-        if (time - i) * i > distance:
-            options_to_win += 1
+def solve_batch(problem_input: Iterable[str]) -> str:
+    "Solves many races in one pass, one race per line (`<time> <distance>`)"
+    result = []
 
-    logging.debug(f'options_to_win={options_to_win}')
-    return options_to_win
+    for line in problem_input:
+        if not line.strip():
+            continue
 
+        time, distance = line.split()
+        result.append(str(ways_to_win(int(time), int(distance))))
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser(prog='Programming Exercise Runner')
+    return '\n'.join(result)
 
-    group = parser.add_mutually_exclusive_group(required=True)
-    group.add_argument('--part1', action='store_const', dest='fn', const=solve_part1)
-    group.add_argument('--part2', action='store_const', dest='fn', const=solve_part2)
-    group.add_argument('--benchmark', nargs='?', type=int, const=1)
 
-    args = parser.parse_args()
+SOLUTION = runner.register(
+    __file__, solve_part1, solve_part2,
+    parse=parse_input,
+    solve_parsed_part1=solve_parsed_part1,
+    solve_parsed_part2=solve_parsed_part2,
+    modes=[runner.Mode('--batch', lambda _: print(solve_batch(sys.stdin)), {'action': 'store_true'})],
+)
 
-    if args.fn:
-        print(args.fn(sys.stdin.readlines()))
-    elif args.benchmark:
-        stdin = sys.stdin.readlines()
-        print('Part 1: %fs' % timeit.timeit(lambda: solve_part1(stdin), number=args.benchmark))
-        print('Part 2: %fs' % timeit.timeit(lambda: solve_part2(stdin), number=args.benchmark))
+
+if __name__ == '__main__':
+    runner.main(SOLUTION)
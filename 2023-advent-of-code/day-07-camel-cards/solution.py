@@ -1,95 +1,267 @@
 #!/usr/bin/env python
 
-import argparse
-import logging
+import dataclasses
+import functools
 import os
 import sys
-import timeit
 
-from collections import Counter, OrderedDict
-from typing import Optional
+from types import ModuleType
+from collections.abc import Iterable, Iterator
 
 
-logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper())
+# The shared runner lives in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
+from aoc import inputs, runner, trace
 
-def solve_helper(problem_input: list[str], alphabet: str, joker: Optional[str]) -> int:
-    ranked_hands = OrderedDict([
-        ('five_of_a_kind', []),
-        ('four_of_a_kind', []),
-        ('full_house', []),
-        ('three_of_a_kind', []),
-        ('two_pair', []),
-        ('one_pair', []),
-        ('high_card', []),
-        ('nothing', []),
-    ])
+
+# { part: (alphabet, joker) }
+RULES: dict[int, tuple[str, str | None]] = {
+    1: ('AKQJT98765432', None),
+    2: ('AKQT98765432J', 'J'),
+}
+
+HAND_SIZE = 5
+NUM_CARDS = 13
+NUM_HANDS = NUM_CARDS ** HAND_SIZE
+DIGITS = '0123456789abc' # Base-13 digits, so int(digits, 13) gives us the code of a hand
+NUMPY_MIN_HANDS = 25_000 # Hands needed to pay for importing numpy and building the whole table of types
+
+# Type of hand (the strongest the highest) by (number of cards of the most repeated, number of different cards)
+HAND_TYPES = {
+    (5, 1): 6, # Five of a kind
+    (4, 2): 5, # Four of a kind
+    (3, 2): 4, # Full house
+    (3, 3): 3, # Three of a kind
+    (2, 3): 2, # Two pair
+    (2, 4): 1, # One pair
+    (1, 5): 0, # High card
+}
+
+
+def hand_type(code: int, joker: bool) -> int:
+    "Type of the hand with the given code (see `hand_types_table`)"
+    hand = [(code // NUM_CARDS ** (HAND_SIZE - 1 - i)) % NUM_CARDS for i in range(HAND_SIZE)]
+    cards = [card for card in hand if card != 0] if joker else hand
+
+    if not cards: # All jokers "JJJJJ"
+        return HAND_TYPES[(5, 1)]
+
+    most_repeated = max(map(cards.count, cards)) + (HAND_SIZE - len(cards))
+    return HAND_TYPES[(most_repeated, len(set(cards)))]
+
+
+class HandTypes(dict):
+    "Lazy version of the table of hand types: the type of a hand is only computed the first time it's seen"
+
+    def __init__(self, joker: bool):
+        super().__init__()
+        self.joker = joker
+
+    def __missing__(self, code: int) -> int:
+        self[code] = hand_type(code, self.joker)
+        return self[code]
+
+
+@functools.cache
+def lazy_hand_types(joker: bool) -> HandTypes:
+    return HandTypes(joker)
+
+
+@functools.cache
+def full_hand_types(joker: bool) -> bytes | None:
+    "The whole table (None without numpy, which is the only way to build it fast enough)"
+    if (numpy := runner.optional_import('numpy')) is None:
+        return None
+
+    return hand_types_table_numpy(numpy, joker)
+
+
+def hand_types_table(joker: bool, num_hands: int) -> bytes | HandTypes:
+    """
+    Type of every possible hand, indexed by its code: the base-13 number formed by the ranks of its
+    cards (0 being the weakest card). If `joker`, the weakest card is a joker and it becomes the
+    most repeated card of the hand.
+
+    Importing numpy and building the whole table takes longer than computing the types of tens of
+    thousands of hands one by one, so the types are computed (and remembered) as the hands show
+    up unless there are many of them.
+    """
+    if num_hands >= NUMPY_MIN_HANDS and (table := full_hand_types(joker)) is not None:
+        return table
+
+    return lazy_hand_types(joker)
+
+
+def hand_types_table_numpy(numpy: ModuleType, joker: bool) -> bytes:
+    "Same as `hand_types_table` but computing all the hands at the same time, card by card"
+    codes = numpy.arange(NUM_HANDS)
+    cards = [(codes // NUM_CARDS ** (HAND_SIZE - 1 - i)) % NUM_CARDS for i in range(HAND_SIZE)]
+    real = [card != 0 if joker else numpy.ones(NUM_HANDS, dtype=bool) for card in cards]
+    jokers = HAND_SIZE - sum(r.astype(numpy.int8) for r in real)
+
+    most_repeated = numpy.zeros(NUM_HANDS, dtype=numpy.int8)
+    distinct = numpy.zeros(NUM_HANDS, dtype=numpy.int8)
+
+    for i in range(HAND_SIZE):
+        same = [(cards[i] == cards[j]) & real[j] for j in range(HAND_SIZE)]
+        most_repeated = numpy.maximum(most_repeated, sum(s.astype(numpy.int8) for s in same) * real[i])
+
+        # A card is new if none of the previous cards is the same
+        seen_before = numpy.zeros(NUM_HANDS, dtype=bool)
+        for j in range(i):
+            seen_before |= same[j]
+        distinct += real[i] & ~seen_before
+
+    types = numpy.full((HAND_SIZE + 1, HAND_SIZE + 1), HAND_TYPES[(5, 1)], dtype=numpy.uint8)
+    for (most, num_distinct), hand_type in HAND_TYPES.items():
+        types[most, num_distinct] = hand_type
+
+    return types[most_repeated + jokers, distinct].tobytes()
+
+
+def encode_hand(hand: str, to_digits: dict[int, int], hand_types: bytes | HandTypes) -> int:
+    "Encodes a hand as a single integer: its type and then the rank of its five cards in base 13"
+    code = int(hand.translate(to_digits), NUM_CARDS)
+    return hand_types[code] * NUM_HANDS + code
+
+
+def parse_input(problem_input: Iterable[str]) -> tuple[list[str], list[int]]:
+    "The hands and their bets (in two separate lists)"
+    hands: list[str] = []
+    bets: list[int] = []
 
     for line in problem_input:
-        hand, bet = line[0:5], int(line[6:].strip())
-        hand_without_jokers = hand if not joker else hand.replace(joker, '')
-
-        counter = Counter(hand_without_jokers)
-        values = list(counter.values())
-        values.sort()
-
-        hand_size = len(hand_without_jokers)
-
-        if values == [hand_size]:
-            ranked_hands['five_of_a_kind'].append((hand, bet))
-        elif values == [1, hand_size - 1]:
-                ranked_hands['four_of_a_kind'].append((hand, bet))
-        elif values == [2, hand_size - 2]:
-                ranked_hands['full_house'].append((hand, bet))
-        elif values == [1, 1, hand_size - 2]:
-                ranked_hands['three_of_a_kind'].append((hand, bet))
-        elif values == [1, hand_size - 3, hand_size - 3]:
-                ranked_hands['two_pair'].append((hand, bet))
-        elif values == [1, 1, 1, hand_size - 3]:
-                ranked_hands['one_pair'].append((hand, bet))
-        elif values == [1, 1, 1, 1, 1]:
-                ranked_hands['high_card'].append((hand, bet))
-        elif values == []: # All jokers "JJJJJ"
-            ranked_hands['five_of_a_kind'].append((hand, bet))
-
-    multiplier = len(problem_input)
+        if not line.strip():
+            continue
+
+        hands.append(line[0:HAND_SIZE])
+        bets.append(int(line[HAND_SIZE + 1:]))
+
+    return hands, bets
+
+
+def solve_helper(parsed: tuple[list[str], list[int]], alphabet: str, joker: str | None) -> int:
+    "Sorting the encoded hands sorts them by strength"
+    hand_types = hand_types_table(joker is not None, len(parsed[0]))
+    to_digits = str.maketrans(alphabet[::-1], DIGITS) # `alphabet` goes from the strongest card
+    hands, bets = parsed
+    keys = [encode_hand(hand, to_digits, hand_types) for hand in hands]
+
+    # We pack the position of the hand with its key, so equal hands are ranked in their input
+    # order (the first one being the strongest)
+    num_hands = len(keys)
+    sorted_hands = sorted(key * num_hands + (num_hands - 1 - i) for i, key in enumerate(keys))
     result = 0
 
-    for _, hands in ranked_hands.items():
-        sorted_hands = sorted(
-            hands,
-            key=lambda h: [alphabet.index(h[0][i]) for i in range(len(h[0]))],
-        )
+    for rank, packed in enumerate(sorted_hands, 1):
+        result += bets[num_hands - 1 - packed % num_hands] * rank
+
+    trace.count('hands ranked', num_hands)
+    trace.debug('num_hands=%d, result=%d', num_hands, result)
+    return result
+
+
+@dataclasses.dataclass
+class Ranking:
+    """
+    Ranking of hands that keeps the total winnings up to date while hands are added. It uses two
+    Fenwick trees indexed by the encoded hands: how many hands and how much money was bet on each.
+    """
+    to_digits: dict[int, int]
+    hand_types: bytes | HandTypes
+    counts: list[int]
+    bets: list[int]
+    total_bets: int = 0
+    winnings: int = 0
 
-        for hand in sorted_hands:
-            logging.debug(f'result = {result} + ({hand[1]} * {multiplier}) [{hand[0]}]')
-            result += hand[1] * multiplier
-            multiplier = max(1, multiplier - 1)
+
+def new_ranking(alphabet: str, joker: str | None) -> Ranking:
+    size = len(HAND_TYPES) * NUM_HANDS + 1 # Fenwick trees start at index 1
+    return Ranking(
+        to_digits=str.maketrans(alphabet[::-1], DIGITS),
+        hand_types=lazy_hand_types(joker is not None), # We don't know how many hands will come
+        counts=[0] * size,
+        bets=[0] * size,
+    )
+
+
+def fenwick_add(tree: list[int], index: int, value: int):
+    while index < len(tree):
+        tree[index] += value
+        index += index & -index
+
+
+def fenwick_sum(tree: list[int], index: int) -> int:
+    "Sum of the values in [1, index]"
+    result = 0
+
+    while index > 0:
+        result += tree[index]
+        index -= index & -index
 
     return result
 
 
-def solve_part1(problem_input: list[str]) -> int:
-    return solve_helper(problem_input, 'AKQJT98765432', None)
+def add_hand(ranking: Ranking, hand: str, bet: int) -> int:
+    """
+    Adds a hand in O(log n) and returns the new total winnings. The new hand goes after all the
+    weaker ones, and every hand at least as strong (the ones that were already there are stronger
+    than the new one) goes up one rank, so their bets are won once more.
+    """
+    index = encode_hand(hand, ranking.to_digits, ranking.hand_types) + 1
 
+    rank = fenwick_sum(ranking.counts, index - 1) + 1
+    stronger_bets = ranking.total_bets - fenwick_sum(ranking.bets, index - 1)
 
-def solve_part2(problem_input: list[str]) -> int:
-    return solve_helper(problem_input, 'AKQT98765432J', 'J')
+    ranking.winnings += bet * rank + stronger_bets
+    ranking.total_bets += bet
 
+    fenwick_add(ranking.counts, index, 1)
+    fenwick_add(ranking.bets, index, bet)
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser(prog='Programming Exercise Runner')
+    return ranking.winnings
 
-    group = parser.add_mutually_exclusive_group(required=True)
-    group.add_argument('--part1', action='store_const', dest='fn', const=solve_part1)
-    group.add_argument('--part2', action='store_const', dest='fn', const=solve_part2)
-    group.add_argument('--benchmark', nargs='?', type=int, const=1)
 
-    args = parser.parse_args()
+def solve_online(problem_input: Iterable[str], alphabet: str, joker: str | None) -> Iterator[int]:
+    "Yields the total winnings after adding every hand"
+    ranking = new_ranking(alphabet, joker)
 
-    if args.fn:
-        print(args.fn(sys.stdin.readlines()))
-    elif args.benchmark:
-        stdin = sys.stdin.readlines()
-        print('Part 1: %fs' % timeit.timeit(lambda: solve_part1(stdin), number=args.benchmark))
-        print('Part 2: %fs' % timeit.timeit(lambda: solve_part2(stdin), number=args.benchmark))
+    for line in problem_input:
+        if line.strip():
+            yield add_hand(ranking, line[0:HAND_SIZE], int(line[HAND_SIZE + 1:]))
+
+
+def solve_parsed_part1(parsed: tuple[list[str], list[int]]) -> int:
+    return solve_helper(parsed, *RULES[1])
+
+
+def solve_parsed_part2(parsed: tuple[list[str], list[int]]) -> int:
+    return solve_helper(parsed, *RULES[2])
+
+
+def solve_part1(problem_input: Iterable[str]) -> int:
+    return solve_parsed_part1(parse_input(problem_input))
+
+
+def solve_part2(problem_input: Iterable[str]) -> int:
+    return solve_parsed_part2(parse_input(problem_input))
+
+
+def print_online(part: int):
+    for winnings in solve_online(sys.stdin, *RULES[part]):
+        print(winnings, flush=True)
+
+
+SOLUTION = runner.register(
+    __file__, solve_part1, solve_part2,
+    parse=parse_input,
+    solve_parsed_part1=solve_parsed_part1,
+    solve_parsed_part2=solve_parsed_part2,
+    modes=[runner.Mode('--online', print_online, {'type': int, 'choices': RULES.keys()})],
+    reads=inputs.LINES,
+)
+
+
+if __name__ == '__main__':
+    runner.main(SOLUTION)
@@ -1,17 +1,16 @@
 #!/usr/bin/env python
 
-import argparse
 import dataclasses
-import logging
 import os
 import math
 import sys
-import timeit
 
-from typing import Callable
+from collections.abc import Callable
 
+# The shared runner lives in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
-logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper())
+from aoc import runner, trace
 
 
 @dataclasses.dataclass
@@ -31,60 +30,296 @@ def parse_input(problem_input: list[str]) -> Input:
     return Input(instructions, network)
 
 
-def solve_helper(mapp: Input, first_node: str, stop_cond: Callable[[str], bool]) -> int:
-    current_node = first_node
-    num_steps = 0
-    instruction_idx = 0
+@dataclasses.dataclass
+class Cycle:
+    """
+    The path of a ghost is eventually periodic: after `offset` steps it enters a cycle of `period`
+    steps. `hits` are all the steps (before `offset + period`) where the ghost is in a final node.
+    """
+    offset: int
+    period: int
+    hits: list[int]
 
-    while stop_cond(current_node):
-        left_node, right_node = mapp.network[current_node]
-        num_steps += 1
 
-        match mapp.instructions[instruction_idx]:
+def compile_directions(instructions: str) -> list[int]:
+    "Converts the instructions to indexes of the (left_node, right_node) tuples"
+    directions = []
+
+    for instruction_idx, instruction in enumerate(instructions):
+        match instruction:
             case 'L':
-                current_node = left_node
+                directions.append(0)
             case 'R':
-                current_node = right_node
+                directions.append(1)
             case _:
-                logging.error(f'Invalid instruction in {instruction_idx}')
+                raise ValueError(f'Invalid instruction in {instruction_idx}')
 
-        logging.debug(f' -> {current_node}')
-        instruction_idx = (instruction_idx + 1) % len(mapp.instructions)
+    if not directions:
+        raise ValueError('There are no instructions')
 
-    return num_steps
+    return directions
 
 
-def solve_part1(problem_input: list[str]) -> int:
-    mapp = parse_input(problem_input)
-    return solve_helper(mapp, 'AAA', lambda c: c != 'ZZZ')
+@dataclasses.dataclass
+class Network:
+    """
+    The network compiled to integer node IDs. On top of the single steps (`children`) we keep:
+     - `pass_end[node]`: the node where a whole pass of the instructions starting in `node` ends
+     - `pass_z_hits[node]`: the (step, node) of that pass (0 <= step < pass_length) in a node that
+       ends with Z. The final nodes of both parts are among them, so they are filtered per part
+     - `lifting[k][node]`: the node after 2^k whole passes (binary lifting)
+    """
+    names: list[str]
+    ids: dict[str, int]
+    directions: list[int]
+    children: tuple[list[int], list[int]] # (left_nodes, right_nodes)
+    pass_end: list[int]
+    pass_z_hits: list[list[tuple[int, int]]]
+    lifting: list[list[int]]
 
+    @property
+    def pass_length(self) -> int:
+        return len(self.directions)
 
-def solve_part2(problem_input: list[str]) -> int:
-    mapp = parse_input(problem_input)
 
-    all_nodes_steps = []
-    starting_nodes = [n for n in mapp.network.keys() if n.endswith("A")]
+@dataclasses.dataclass
+class Hits:
+    """
+    The final nodes of a part in the passes of the network:
+     - `pass_hits[node]`: the steps of the pass starting in `node` in a final node
+     - `lifting_hits[k][node]`: if there is any final node during the 2^k passes from `node`
+    """
+    pass_hits: list[list[int]]
+    lifting_hits: list[list[bool]]
 
-    for starting_node in starting_nodes:
-        steps = solve_helper(mapp, starting_node, lambda c: not c.endswith('Z'))
-        all_nodes_steps.append(steps)
 
-    return math.lcm(*all_nodes_steps)
+def compile_network(mapp: Input) -> Network:
+    "Everything that doesn't depend on the part (the O(nodes x instructions) work) is done once"
+    names = list(mapp.network.keys())
+    ids = {name: node for node, name in enumerate(names)}
+    directions = compile_directions(mapp.instructions)
 
+    children = (
+        [ids[mapp.network[name][0]] for name in names],
+        [ids[mapp.network[name][1]] for name in names],
+    )
+    ends_with_z = [name.endswith('Z') for name in names]
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser(prog='Programming Exercise Runner')
+    # We walk a whole pass from every node at the same time (one list comprehension per step)
+    current = list(range(len(names)))
+    pass_z_hits: list[list[tuple[int, int]]] = [[] for _ in names]
+
+    for step, direction in enumerate(directions):
+        for node, current_node in enumerate(current):
+            if ends_with_z[current_node]:
+                pass_z_hits[node].append((step, current_node))
+
+        next_nodes = children[direction]
+        current = [next_nodes[current_node] for current_node in current]
+
+    pass_end = current
+    lifting = [pass_end]
+    trace.count('pass steps compiled', len(names) * len(directions))
+
+    # Enough levels to skip more passes than nodes (enough to go around any cycle). 2^(k+1)
+    # passes are 2^k passes twice
+    while (1 << len(lifting)) <= len(names):
+        last = lifting[-1]
+        lifting.append([last[last[node]] for node in range(len(last))])
+
+    return Network(names, ids, directions, children, pass_end, pass_z_hits, lifting)
+
+
+def parse_network(problem_input: list[str]) -> Network:
+    return compile_network(parse_input(problem_input))
+
+
+def find_hits(network: Network, is_final: Callable[[str], bool]) -> Hits:
+    "The hits of a part, whose final nodes must all end with Z (linear in the number of Z hits)"
+    final = [is_final(name) for name in network.names]
+    pass_hits = [[step for step, node in z_hits if final[node]] for z_hits in network.pass_z_hits]
+    lifting_hits = [[len(hits) > 0 for hits in pass_hits]]
+
+    for last in network.lifting[:-1]:
+        last_hits = lifting_hits[-1]
+        lifting_hits.append([last_hits[node] or last_hits[last[node]] for node in range(len(last))])
+
+    return Hits(pass_hits, lifting_hits)
+
+
+def first_hit(network: Network, hits: Hits, node: int) -> int | None:
+    "First step where we are in a final node (None if it never happens)"
+    num_passes = 0
+
+    # Skip (from the biggest jump to the smallest) all the passes without any final node
+    for level in range(len(network.lifting) - 1, -1, -1):
+        if not hits.lifting_hits[level][node]:
+            node = network.lifting[level][node]
+            num_passes += 1 << level
+
+    trace.count('lifting levels probed', len(network.lifting))
+
+    if not hits.pass_hits[node]:
+        return None
+
+    return num_passes * network.pass_length + hits.pass_hits[node][0]
+
+
+def find_cycle(network: Network, hits: Hits, first_node: int) -> Cycle:
+    """
+    The state of a ghost is (node, instruction_idx), so its path repeats as soon as it's again in
+    the same node at the beginning of the instructions. We only need to remember the node where
+    every pass of the instructions starts, and there are at most `len(network)` different ones.
+    With the precomputed passes, each of them is a single lookup.
+    """
+    pass_starts: dict[int, int] = {} # { node: step }
+    cycle_hits: list[int] = []
+
+    current_node = first_node
+    num_steps = 0
+
+    while current_node not in pass_starts:
+        pass_starts[current_node] = num_steps
+        cycle_hits.extend(num_steps + hit for hit in hits.pass_hits[current_node])
+
+        current_node = network.pass_end[current_node]
+        num_steps += network.pass_length
+
+    offset = pass_starts[current_node]
+    trace.count('passes followed', len(pass_starts))
+    trace.debug('%s: offset=%d, period=%d, hits=%d', network.names[first_node], offset, num_steps - offset, len(cycle_hits))
+
+    return Cycle(offset, num_steps - offset, cycle_hits)
+
+
+def crt(residue1: int, modulus1: int, residue2: int, modulus2: int) -> int | None:
+    "Generalized CRT: x = residue1 (mod modulus1) and x = residue2 (mod modulus2), if possible"
+    gcd = math.gcd(modulus1, modulus2)
+
+    if (residue2 - residue1) % gcd != 0:
+        return None
 
-    group = parser.add_mutually_exclusive_group(required=True)
-    group.add_argument('--part1', action='store_const', dest='fn', const=solve_part1)
-    group.add_argument('--part2', action='store_const', dest='fn', const=solve_part2)
-    group.add_argument('--benchmark', nargs='?', type=int, const=1)
+    k = ((residue2 - residue1) // gcd * pow(modulus1 // gcd, -1, modulus2 // gcd)) % (modulus2 // gcd)
+    return (residue1 + modulus1 * k) % math.lcm(modulus1, modulus2)
 
-    args = parser.parse_args()
 
-    if args.fn:
-        print(args.fn(sys.stdin.readlines()))
-    elif args.benchmark:
-        stdin = sys.stdin.readlines()
-        print('Part 1: %fs' % timeit.timeit(lambda: solve_part1(stdin), number=args.benchmark))
-        print('Part 2: %fs' % timeit.timeit(lambda: solve_part2(stdin), number=args.benchmark))
+def scan_common_hit(
+    candidates: list[int], modulus: int, cycles: list[Cycle], residues: list[set[int]], all_in_cycle: int,
+) -> int | None:
+    """
+    First step >= all_in_cycle that is one of the `candidates` (mod `modulus`) and a hit of all
+    the `cycles`. The steps are scanned in order, so it stops as soon as it finds one (quickly
+    when the ghosts hit final nodes often). If there is none, it gives up after a whole period.
+    """
+    tracing = trace.ENABLED
+    end = all_in_cycle + math.lcm(modulus, *(cycle.period for cycle in cycles))
+    block = all_in_cycle - all_in_cycle % modulus
+    candidates = sorted(candidates)
+
+    while block < end:
+        if tracing:
+            trace.count('steps scanned', len(candidates))
+
+        for residue in candidates:
+            step = block + residue
+
+            if all_in_cycle <= step < end and all(
+                step % cycle.period in cycle_residues for cycle, cycle_residues in zip(cycles, residues)
+            ):
+                return step
+
+        block += modulus
+
+    return None
+
+
+def first_common_hit(cycles: list[Cycle], budget: int) -> int | None:
+    """
+    First step where all the ghosts are in a final node at the same time (None if it never happens).
+
+    The residues where every ghost hits a final node are merged with the CRT, but their
+    combinations grow exponentially with the number of ghosts. Once there would be more of them
+    than `budget` (or than steps in their period) we scan the steps instead. The scan stops at the
+    first common hit, which is soon when there are many combinations, but it's only bounded by
+    the period of all the ghosts together.
+    """
+    before_cycle = [{hit for hit in cycle.hits if hit < cycle.offset} for cycle in cycles]
+    residues = [{hit % cycle.period for hit in cycle.hits if hit >= cycle.offset} for cycle in cycles]
+
+    def is_hit(i: int, step: int) -> bool:
+        if step < cycles[i].offset:
+            return step in before_cycle[i]
+        return step % cycles[i].period in residues[i]
+
+    # Before every ghost is inside its cycle, the only candidates are the hits of the ghost that
+    # takes longer to get into its cycle
+    longest = max(range(len(cycles)), key=lambda i: cycles[i].offset)
+    all_in_cycle = cycles[longest].offset
+
+    for step in sorted(before_cycle[longest]):
+        if all(is_hit(i, step) for i in range(len(cycles))):
+            return step
+
+    # Afterwards, every ghost only hits a final node in some residues of its period, so we merge
+    # them (all combinations) using the CRT
+    combined, modulus = {0}, 1
+
+    for i, (cycle, cycle_residues) in enumerate(zip(cycles, residues)):
+        if len(combined) * len(cycle_residues) > min(budget, math.lcm(modulus, cycle.period)):
+            return scan_common_hit(list(combined), modulus, cycles[i:], residues[i:], all_in_cycle)
+
+        merged = {crt(r1, modulus, r2, cycle.period) for r1 in combined for r2 in cycle_residues}
+        combined = {r for r in merged if r is not None}
+        modulus = math.lcm(modulus, cycle.period)
+
+        if not combined:
+            return None
+
+    # The smallest step >= all_in_cycle for every residue (ceil division of the missing steps)
+    return min(r + max(0, -((r - all_in_cycle) // modulus)) * modulus for r in combined)
+
+
+def solve_parsed_part1(network: Network) -> int:
+    steps = first_hit(network, find_hits(network, lambda c: c == 'ZZZ'), network.ids['AAA'])
+
+    if steps is None:
+        raise ValueError('ZZZ is not reachable from AAA')
+
+    return steps
+
+
+def solve_parsed_part2(network: Network) -> int:
+    hits = find_hits(network, lambda c: c.endswith('Z'))
+
+    starting_nodes = [node for node, name in enumerate(network.names) if name.endswith("A")]
+
+    if not starting_nodes:
+        raise ValueError('There are no ghosts (no node ends with A)')
+
+    cycles = [find_cycle(network, hits, node) for node in starting_nodes]
+    steps = first_common_hit(cycles, budget=len(network.names) * network.pass_length)
+
+    if steps is None:
+        raise ValueError('The ghosts are never in Z nodes at the same time')
+
+    return steps
+
+
+def solve_part1(problem_input: list[str]) -> int:
+    return solve_parsed_part1(parse_network(problem_input))
+
+
+def solve_part2(problem_input: list[str]) -> int:
+    return solve_parsed_part2(parse_network(problem_input))
+
+
+SOLUTION = runner.register(
+    __file__, solve_part1, solve_part2,
+    parse=parse_network,
+    solve_parsed_part1=solve_parsed_part1,
+    solve_parsed_part2=solve_parsed_part2,
+)
+
+
+if __name__ == '__main__':
+    runner.main(SOLUTION)
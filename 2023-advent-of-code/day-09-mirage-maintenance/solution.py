@@ -1,71 +1,147 @@
 #!/usr/bin/env python
 
-import argparse
-import logging
+import functools
+import math
 import os
 import sys
-import timeit
 
+from collections.abc import Iterable
 
-logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper())
+# The shared runner lives in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
+from aoc import inputs, runner, trace
 
-def calculate_diffs(nums: list[int]) -> list[list[int]]:
-    "It calculates the diffs array (until it reaches [0, 0, 0, ...])"
-    diffs = [nums]
 
-    while diffs[-1] != ([0] * len(diffs[-1])):
-        diffs.append([diffs[-1][i+1] - diffs[-1][i] for i in range(len(diffs[-1]) - 1)])
+BATCH_SIZE = 8192 # Lines of each group solved together when streaming
 
-    return diffs
+# Importing numpy takes longer than solving a few thousand sequences with python ints, so smaller
+# groups don't use it
+NUMPY_MIN_SEQUENCES = BATCH_SIZE
 
+Sequences = 'numpy.ndarray | list[list[int]]' # The sequences of a group: a matrix with a row per sequence or python ints
 
-def solve_part1(problem_input: list[str]) -> int:
-    lines = [[int(num) for num in line.split()] for line in problem_input]
+
+@functools.cache
+def extrapolation_coefficients(length: int) -> tuple[list[int], list[int]]:
+    """
+    Calculating the diffs until we reach all zeros and adding them back is the same as assuming the
+    n-th diff is 0, so the next and previous values are binomial-weighted sums of the sequence:
+        next     = sum((-1)^(n-1-k) * C(n, k) * nums[k])
+        previous = sum((-1)^k * C(n, k+1) * nums[k])
+    """
+    next_coefficients = [(-1) ** (length - 1 - k) * math.comb(length, k) for k in range(length)]
+    previous_coefficients = [(-1) ** k * math.comb(length, k + 1) for k in range(length)]
+
+    return next_coefficients, previous_coefficients
+
+
+def parse_sequences(lines: list[str], length: int) -> Sequences:
+    """
+    With numpy, the sequences of big groups are parsed (and then solved) as a single int64 matrix,
+    but we can only do it if nothing overflows int64 (otherwise we go on with python ints). The
+    biggest coefficient is the same for both parts, so the check is done once here. Numbers too big
+    for int64 are parsed as its max/min values, so we can't trust any of those either
+    """
+    numpy = runner.optional_import('numpy') if len(lines) >= NUMPY_MIN_SEQUENCES else None
+
+    if numpy is not None:
+        matrix = numpy.fromstring(' '.join(lines), dtype=numpy.int64, sep=' ').reshape(len(lines), length)
+        max_value = max(int(matrix.max()), -int(matrix.min()))
+        max_coefficient = max(map(abs, extrapolation_coefficients(length)[0]))
+
+        if max_value < 2 ** 63 - 1 and max_coefficient * max_value * length < 2 ** 63:
+            return matrix
+
+    return [[int(num) for num in line.split()] for line in lines]
+
+
+def group_by_length(problem_input: Iterable[str]) -> dict[int, Sequences]:
+    "All the sequences with the same length share the coefficients, so we solve them together"
+    groups: dict[int, list[str]] = {} # { length: [line1, line2, ...] }
+
+    for line in problem_input:
+        length = len(line.split())
+
+        if length > 0:
+            groups.setdefault(length, []).append(line)
+
+    return {length: parse_sequences(lines, length) for length, lines in groups.items()}
+
+
+def sum_of_extrapolations(groups: dict[int, Sequences], previous: bool) -> int:
+    tracing = trace.ENABLED
     result = 0
 
-    for line in lines:
-        diffs = calculate_diffs(line)
+    for length, sequences in groups.items():
+        coefficients = extrapolation_coefficients(length)[1 if previous else 0]
+
+        if isinstance(sequences, list):
+            if tracing:
+                trace.count('sequences (python)', len(sequences))
 
-        for i in range(len(diffs) - 2, -1, -1):
-            diffs[i].append(diffs[i][-1] + diffs[i+1][-1])
+            for sequence in sequences:
+                result += sum(c * num for c, num in zip(coefficients, sequence))
+        else:
+            if tracing:
+                trace.count('sequences (numpy)', len(sequences))
 
-        result += diffs[0][-1]
-        logging.debug(diffs)
+            numpy = runner.optional_import('numpy')
+            result += sum((sequences @ numpy.array(coefficients, dtype=numpy.int64)).tolist())
 
+    trace.debug('groups=%s, result=%d', list(groups.keys()), result)
     return result
 
 
-def solve_part2(problem_input: list[str]) -> int:
-    lines = [[int(num) for num in line.split()] for line in problem_input]
+def stream_extrapolations(problem_input: Iterable[str], previous: bool) -> int:
+    """
+    Same as `sum_of_extrapolations(group_by_length(...))` but reading one line at a time: every
+    group is solved (and emptied) as soon as it's full, so the memory doesn't grow with the input
+    """
+    groups: dict[int, list[str]] = {} # { length: [line1, line2, ...] }
     result = 0
 
-    for line in lines:
-        diffs = calculate_diffs(line)
+    for line in problem_input:
+        length = len(line.split())
 
-        # We will still append at the end as it doesn't require moving the array
-        for i in range(len(diffs) - 2, -1, -1):
-            diffs[i].append(diffs[i][0] - diffs[i+1][-1])
+        if length == 0:
+            continue
 
-        result += diffs[0][-1]
-        logging.debug(diffs)
+        group = groups.setdefault(length, [])
+        group.append(line)
 
-    return result
+        if len(group) == BATCH_SIZE:
+            result += sum_of_extrapolations({length: parse_sequences(group, length)}, previous)
+            group.clear()
 
+    rest = {length: parse_sequences(group, length) for length, group in groups.items() if group}
+    return result + sum_of_extrapolations(rest, previous)
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser(prog='Programming Exercise Runner')
 
-    group = parser.add_mutually_exclusive_group(required=True)
-    group.add_argument('--part1', action='store_const', dest='fn', const=solve_part1)
-    group.add_argument('--part2', action='store_const', dest='fn', const=solve_part2)
-    group.add_argument('--benchmark', nargs='?', type=int, const=1)
+def solve_parsed_part1(groups: dict[int, Sequences]) -> int:
+    return sum_of_extrapolations(groups, previous=False)
+
+
+def solve_parsed_part2(groups: dict[int, Sequences]) -> int:
+    return sum_of_extrapolations(groups, previous=True)
+
 
-    args = parser.parse_args()
+def solve_part1(problem_input: Iterable[str]) -> int:
+    return stream_extrapolations(problem_input, previous=False)
 
-    if args.fn:
-        print(args.fn(sys.stdin.readlines()))
-    elif args.benchmark:
-        stdin = sys.stdin.readlines()
-        print('Part 1: %fs' % timeit.timeit(lambda: solve_part1(stdin), number=args.benchmark))
-        print('Part 2: %fs' % timeit.timeit(lambda: solve_part2(stdin), number=args.benchmark))
+
+def solve_part2(problem_input: Iterable[str]) -> int:
+    return stream_extrapolations(problem_input, previous=True)
+
+
+SOLUTION = runner.register(
+    __file__, solve_part1, solve_part2,
+    parse=group_by_length,
+    solve_parsed_part1=solve_parsed_part1,
+    solve_parsed_part2=solve_parsed_part2,
+    reads=inputs.LINES,
+)
+
+
+if __name__ == '__main__':
+    runner.main(SOLUTION)
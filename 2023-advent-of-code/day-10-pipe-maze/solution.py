@@ -1,118 +1,184 @@
 #!/usr/bin/env python
 
-import argparse
-import logging
+import dataclasses
 import os
 import sys
-import timeit
 
-from collections import deque
+from collections.abc import Iterator
 
+# The shared runner lives in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
-logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper())
+from aoc import runner, trace
 
 
-Coords = tuple[int, int]
-Distance = int
+# Connectivity of each pipe as a bitmask of the directions it goes to
+NORTH, SOUTH, WEST, EAST = 1, 2, 4, 8
 
-POSSIBLE_MOVES = {
-    '|': [(-1, 0), (1, 0)], # North, South
-    '-': [(0, -1), (0, 1)], # West, East
-    'L': [(-1, 0), (0, 1)], # North, East
-    'J': [(-1, 0), (0, -1)], # North, West
-    '7': [(1, 0), (0, -1)], # South, West
-    'F': [(1, 0), (0, 1)], # South, East
-    'S': [(-1, 0), (1, 0), (0, -1), (0, 1)], # North, South, West, East 
-    '.': [], # Nowhere
+OPPOSITE = [0] * 9
+OPPOSITE[NORTH], OPPOSITE[SOUTH], OPPOSITE[WEST], OPPOSITE[EAST] = SOUTH, NORTH, EAST, WEST
+
+PIPES = {
+    '|': NORTH | SOUTH,
+    '-': WEST | EAST,
+    'L': NORTH | EAST,
+    'J': NORTH | WEST,
+    '7': SOUTH | WEST,
+    'F': SOUTH | EAST,
 }
 
+# Lookup table indexed by the byte of the tile ('.', 'S' and any other byte go nowhere)
+CONNECTIONS = bytes(PIPES.get(chr(byte), 0) for byte in range(256))
+
+
+@dataclasses.dataclass
+class Maze:
+    """
+    The whole maze is stored in a flat bytearray where the tile (x, y) is in `x * width + y`.
+    It's padded with a row of '.' at the top and bottom and a column of '.' at the right, so
+    moving from any tile lands inside the grid (the left of the first column is the padding of
+    the previous row) and we don't need to check the borders.
+    """
+    grid: bytearray
+    width: int
+    start: int
+
+
+def direction_offsets(maze: Maze) -> list[int]:
+    "Index offset of moving in every direction (indexed by its bitmask)"
+    offsets = [0] * 9
+    offsets[NORTH], offsets[SOUTH], offsets[WEST], offsets[EAST] = -maze.width, maze.width, -1, 1
+    return offsets
+
+
+def parse_input(problem_input: list[str]) -> Maze:
+    lines = [line.strip().encode() for line in problem_input if line.strip()]
+    width = max(len(line) for line in lines) + 1
 
-def find_start_coords(matrix: list[list[str]]) -> Coords:
-    for x, line in enumerate(matrix):
-        for y, char in enumerate(line):
-            if char == 'S':
-                return (x, y)
+    grid = bytearray(b'.' * width)
+    for line in lines:
+        grid += line.ljust(width, b'.')
+    grid += b'.' * width
 
-    raise ValueError('Start coords do not exist')
+    start = grid.find(b'S')
 
+    if start == -1:
+        raise ValueError('Start coords do not exist')
 
-def accessible_neighbours(matrix: list[list[str]], node_coords: Coords) -> list[Coords]:
-    "Get all the valid neighbours from the `node_coords` param"
-    result: list[Coords] = []
+    return Maze(grid, width, start)
 
-    matrix_x_size = len(matrix)
-    matrix_y_size = len(matrix[0])
-    node = matrix[node_coords[0]][node_coords[1]]
 
-    for move in POSSIBLE_MOVES[node]:
-        x = max(0, min(matrix_x_size, node_coords[0] + move[0]))
-        y = max(0, min(matrix_y_size, node_coords[1] + move[1]))
-        result.append((x, y))
+def start_connections(maze: Maze) -> int:
+    "Guess which pipe is hidden below 'S' using the neighbours that connect back to it"
+    offsets = direction_offsets(maze)
+    result = 0
+
+    for direction in (NORTH, SOUTH, WEST, EAST):
+        if CONNECTIONS[maze.grid[maze.start + offsets[direction]]] & OPPOSITE[direction]:
+            result |= direction
 
-    logging.debug(f'{node_coords} -> {list(result)}')
     return result
 
 
-def distances_from_start(matrix: list[list[str]], start_coords: Coords) -> dict[Coords, Distance]:
-    "We search through the whole matrix using BFS"
-    distances: dict[Coords, Distance] = dict()
-    queue: deque[tuple[Coords, Distance]] = deque([(start_coords, 0)])
-    distance: Distance = 0
+def follow(maze: Maze, direction: int) -> Iterator[int]:
+    """
+    Yields the index of every tile of the loop in order, starting with 'S' and leaving it towards
+    `direction`. There is no need of searching: each pipe only has one way out apart from the one
+    we came from.
+    """
+    grid, offsets, start = maze.grid, direction_offsets(maze), maze.start
+    position = start
+
+    while True:
+        yield position
+        position += offsets[direction]
+
+        if position == start:
+            return
+
+        direction = CONNECTIONS[grid[position]] & ~OPPOSITE[direction]
+
+        if direction not in (NORTH, SOUTH, WEST, EAST):
+            raise ValueError(f'The loop is broken in {divmod(position, maze.width)}')
+
 
-    while queue:
-        node_coords, distance = queue.popleft()
+def loop_direction(maze: Maze) -> int:
+    "A direction from 'S' that goes around the loop and back to it"
+    connections = start_connections(maze)
+    directions = [direction for direction in (NORTH, SOUTH, WEST, EAST) if connections & direction]
 
-        if node_coords in distances:
+    if not directions:
+        raise ValueError('Start is not connected to any pipe')
+
+    # With two connections both of them are in the loop, so any of them is fine. With more, some
+    # of them are dead ends and we take the first one that goes back to 'S'
+    if len(directions) <= 2:
+        return directions[0]
+
+    for direction in directions:
+        try:
+            trace.count('tiles traced', sum(1 for _ in follow(maze, direction)))
+            return direction
+        except ValueError:
             continue
 
-        distances[node_coords] = distance
+    raise ValueError('There is no loop going through the start')
 
-        for neighbour_coords in accessible_neighbours(matrix, node_coords):
-            # Check also if we can come back (needed for "." and "S")
-            if node_coords in accessible_neighbours(matrix, neighbour_coords):
-                queue.append((neighbour_coords, distance + 1))
 
-    logging.debug(f'{distances}')
-    return distances
+def trace_loop(maze: Maze) -> Iterator[int]:
+    "Yields the index of every tile of the loop in order, starting with 'S'"
+    return follow(maze, loop_direction(maze))
 
 
-def solve_part1(problem_input: list[str]) -> int:
-    matrix = [list(line.strip()) for line in problem_input]
-    start_coords = find_start_coords(matrix)
-    distances = distances_from_start(matrix, start_coords)
+def solve_parsed_part1(maze: Maze) -> int:
+    loop_length = sum(1 for _ in trace_loop(maze))
 
-    return max(distances.values()) 
+    trace.count('tiles traced', loop_length)
+    trace.debug('loop_length=%d', loop_length)
+    return loop_length // 2
 
 
-def solve_part2(problem_input: list[str]) -> int:
-    matrix = [list(line.strip()) for line in problem_input]
-    start_coords = find_start_coords(matrix)
+def solve_parsed_part2(maze: Maze) -> int:
+    """
+    We compute the area of the loop using the shoelace formula over its tiles, and then the number
+    of tiles inside it using Pick's theorem: area = inside + boundary / 2 - 1
+    """
+    width = maze.width
 
-    distances = distances_from_start(matrix, start_coords)
-    visited_nodes = distances.keys()
+    double_area = 0
+    loop_length = 0
+    prev_x, prev_y = divmod(maze.start, width)
 
-    # Every non-visited pipe should be taken in consideration (we change them to ".")
-    for x in range(len(matrix)):
-        for y in range(len(matrix[x])):
-            if (x, y) not in visited_nodes:
-                matrix[x][y] = '.'
+    for position in trace_loop(maze):
+        x, y = divmod(position, width)
+        double_area += prev_x * y - x * prev_y
+        loop_length += 1
+        prev_x, prev_y = x, y
 
-    return 0
+    # Close the polygon (from the last tile back to 'S')
+    x, y = divmod(maze.start, width)
+    double_area += prev_x * y - x * prev_y
 
+    trace.count('tiles traced', loop_length)
+    trace.debug('double_area=%d, loop_length=%d', double_area, loop_length)
+    return abs(double_area) // 2 - loop_length // 2 + 1
+
+
+def solve_part1(problem_input: list[str]) -> int:
+    return solve_parsed_part1(parse_input(problem_input))
+
+
+def solve_part2(problem_input: list[str]) -> int:
+    return solve_parsed_part2(parse_input(problem_input))
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser(prog='Programming Exercise Runner')
 
-    group = parser.add_mutually_exclusive_group(required=True)
-    group.add_argument('--part1', action='store_const', dest='fn', const=solve_part1)
-    group.add_argument('--part2', action='store_const', dest='fn', const=solve_part2)
-    group.add_argument('--benchmark', nargs='?', type=int, const=1)
+SOLUTION = runner.register(
+    __file__, solve_part1, solve_part2,
+    parse=parse_input,
+    solve_parsed_part1=solve_parsed_part1,
+    solve_parsed_part2=solve_parsed_part2,
+)
 
-    args = parser.parse_args()
 
-    if args.fn:
-        print(args.fn(sys.stdin.readlines()))
-    elif args.benchmark:
-        stdin = sys.stdin.readlines()
-        print('Part 1: %fs' % timeit.timeit(lambda: solve_part1(stdin), number=args.benchmark))
-        print('Part 2: %fs' % timeit.timeit(lambda: solve_part2(stdin), number=args.benchmark))
+if __name__ == '__main__':
+    runner.main(SOLUTION)
@@ -1,68 +1,115 @@
 #!/usr/bin/env python
 
-import argparse
-import itertools
-import logging
+import dataclasses
 import os
 import sys
-import timeit
 
+# The shared runner lives in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
-logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper())
+from aoc import runner, trace
 
 
-def solve_helper(problem_input: list[str], speed_of_expansion: int) -> int:
-    galaxies = [(x, y) for x, row in enumerate(problem_input) for y, char in enumerate(row) if char == '#']
-    empty_rows = [x for x, row in enumerate(problem_input) if set(row.strip()) == {'.'}]
-    empty_cols = [x for x, col in enumerate(zip(*problem_input)) if set(col) == {'.'}]
+@dataclasses.dataclass
+class Aggregates:
+    """
+    The sum of all the distances is linear in the speed of expansion:
+        distances + speed_of_expansion * empty_crossings
+    """
+    distances: int # Sum of the distances without any expansion
+    empty_crossings: int # Sum of the number of empty lines crossed by every pair
 
-    logging.debug(f'galaxies={galaxies}, empty_rows={empty_rows}, empty_columns={empty_cols}')
-    result = 0
 
-    # Coordinates of each galaxy in (x, y)
-    for (g1x, g1y), (g2x, g2y) in itertools.combinations(galaxies, 2):
-        distance = abs(g1x - g2x) + abs(g1y - g2y)
+def empty_lines_before(values: list[int]) -> list[int]:
+    """
+    The number of empty lines before a coordinate is the coordinate itself minus the number of
+    distinct occupied lines before it.
+    """
+    occupied = {value: rank for rank, value in enumerate(sorted(set(values)))}
+    return [value - occupied[value] for value in values]
 
-        # Let's get the coordinates in order to check if there is empty space between
-        min_row, max_row = (g1x, g2x) if g1x < g2x else (g2x, g1x)
-        min_col, max_col = (g1y, g2y) if g1y < g2y else (g2y, g1y)
 
-        # How many empty rows are between both numbers
-        for empty_row in empty_rows:
-            if min_row < empty_row < max_row:
-                distance += speed_of_expansion
+def sum_of_distances(values: list[int]) -> int:
+    """
+    Sums the distances between every pair of values in one axis: once sorted, each value is at
+    `value` distance from the `i` values before it, minus the sum of all of them (prefix sum).
+    """
+    result, prefix = 0, 0
 
-        # How many empty cols are between both numbers
-        for empty_col in empty_cols:
-            if min_col < empty_col < max_col:
-                distance += speed_of_expansion
-
-        result += distance
+    for i, value in enumerate(sorted(values)):
+        result += value * i - prefix
+        prefix += value
 
     return result
 
 
+def find_galaxies(problem_input: list[str]) -> tuple[list[int], list[int]]:
+    "Returns the rows and the columns of all the galaxies (two separate lists)"
+    rows: list[int] = []
+    cols: list[int] = []
+
+    for x, row in enumerate(problem_input):
+        y = row.find('#')
+
+        while y != -1:
+            rows.append(x)
+            cols.append(y)
+            y = row.find('#', y + 1)
+
+    return rows, cols
+
+
+def compute_aggregates(problem_input: list[str]) -> Aggregates:
+    rows, cols = find_galaxies(problem_input)
+    trace.count('galaxies', len(rows))
+    trace.debug('rows=%s, cols=%s', rows, cols)
+
+    # Manhattan distances are independent in each axis, so we solve them separately
+    return Aggregates(
+        distances=sum_of_distances(rows) + sum_of_distances(cols),
+        empty_crossings=sum_of_distances(empty_lines_before(rows)) + sum_of_distances(empty_lines_before(cols)),
+    )
+
+
+def distance_for(aggregates: Aggregates, speed_of_expansion: int) -> int:
+    return aggregates.distances + speed_of_expansion * aggregates.empty_crossings
+
+
+def solve_speeds(problem_input: list[str], speeds: list[int]) -> list[int]:
+    "Answers many speeds of expansion computing the aggregates only once"
+    aggregates = compute_aggregates(problem_input)
+    return [distance_for(aggregates, speed) for speed in speeds]
+
+
+def solve_parsed_part1(aggregates: Aggregates) -> int:
+    return distance_for(aggregates, 1)
+
+
+def solve_parsed_part2(aggregates: Aggregates) -> int:
+    return distance_for(aggregates, 999_999)
+
+
 def solve_part1(problem_input: list[str]) -> int:
-    return solve_helper(problem_input, 1)
+    return solve_parsed_part1(compute_aggregates(problem_input))
 
 
 def solve_part2(problem_input: list[str]) -> int:
-    return solve_helper(problem_input, 999_999)
+    return solve_parsed_part2(compute_aggregates(problem_input))
 
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser(prog='Programming Exercise Runner')
+def print_speeds(speeds: list[int]):
+    for distance in solve_speeds(sys.stdin.readlines(), speeds):
+        print(distance)
 
-    group = parser.add_mutually_exclusive_group(required=True)
-    group.add_argument('--part1', action='store_const', dest='fn', const=solve_part1)
-    group.add_argument('--part2', action='store_const', dest='fn', const=solve_part2)
-    group.add_argument('--benchmark', nargs='?', type=int, const=1)
 
-    args = parser.parse_args()
+SOLUTION = runner.register(
+    __file__, solve_part1, solve_part2,
+    parse=compute_aggregates,
+    solve_parsed_part1=solve_parsed_part1,
+    solve_parsed_part2=solve_parsed_part2,
+    modes=[runner.Mode('--speeds', print_speeds, {'nargs': '+', 'type': int})],
+)
 
-    if args.fn:
-        print(args.fn(sys.stdin.readlines()))
-    elif args.benchmark:
-        stdin = sys.stdin.readlines()
-        print('Part 1: %fs' % timeit.timeit(lambda: solve_part1(stdin), number=args.benchmark))
-        print('Part 2: %fs' % timeit.timeit(lambda: solve_part2(stdin), number=args.benchmark))
+
+if __name__ == '__main__':
+    runner.main(SOLUTION)
@@ -0,0 +1,9 @@
+#!/usr/bin/env python
+
+import sys
+
+from aoc import runner
+
+
+if __name__ == '__main__':
+    sys.exit(runner.run_days())
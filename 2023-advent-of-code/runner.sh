@@ -0,0 +1,5 @@
+#!/bin/bash
+
+# Checks and benchmarks all the days in a single interpreter. Extra arguments go to run.py,
+# e.g. `./runner.sh --json results.json` or `./runner.sh --baseline results.json`
+cd "$(dirname "$0")" && ./run.py day-*/ --benchmark "$@"